@@ -1,11 +1,20 @@
-from datetime import datetime
-from fastapi import APIRouter, HTTPException, Depends, Query
+from datetime import datetime, timezone
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response, Header
+from fastapi.responses import StreamingResponse, JSONResponse, ORJSONResponse
 from sqlmodel import Session, select, col
-from typing import List
-from app.models.model_product import Products, ProductCreate, ProductRead, ProductUpdate, ProductSummary
-from app.dependencies.database import get_session
-from app.models.model_category import Categories
+from typing import List, Optional, Literal
+from app.models.model_product import Products, ProductCreate, ProductRead, ProductUpdate, ProductSummary, ProductTombstones, ProductChanges, ProductRedeem, ProductRedemptionRead
+from app.dependencies.database import get_session, get_read_session, get_write_session
+from app.core.fields import project_columns
 from app.core.validate_token import get_current_user
+from app.core.versioning import version_etag, expected_version, version_conflict, row_with_etag
+from app.models.model_wallet import LedgerReason
+from app.services.service_wallet import apply_points_statement
+from app.services.service_product import (
+    summary_statement, summary_version_statement, serialize_summary, get_cached_summary, set_cached_summary,
+    invalidate_catalog, summary_etag, not_modified, export_products, EXPORT_FIELDS, import_products,
+    update_product_statement, redemption_quote_statement, redeem_statement, product_fields_statement, changes_statements, changes_payload,
+)
 
 
 # router para los endpoints de user
@@ -13,73 +22,147 @@ router = APIRouter(prefix="/products", tags=["products"])
 
 # Retorna todos los productos de una compañìa
 @router.get("/summary", response_model=List[ProductSummary], summary="Mostrar productos de una compañìa")
-def list_products_summary(company_id: int = Query(...), session: Session = Depends(get_session),current_user: dict = Depends(get_current_user)):
-    statement = (
-        select(
-            Products.id,
-            Products.product_name,
-            Products.category_id,
-            Categories.category_name.label("category_name"),
-            Products.points_value,
-            Products.image_url
-        )
-        .join(Categories, Categories.id == Products.category_id)
-        .where(Products.company_id == company_id)
+def list_products_summary(company_id: int = Query(...), if_none_match: Optional[str] = Header(None), session: Session = Depends(get_session), current_user: dict = Depends(get_current_user)):
+    # Sin caché se lee del primario (sesión perezosa: un acierto no toma conexión); así nunca se
+    # guarda en caché un cuerpo/ETag atrasado de una réplica
+    cached = get_cached_summary(company_id)
+    if cached is not None:
+        etag, body = cached
+    else:
+        # El ETag se calcula con una consulta agregada, antes de traer las filas
+        etag, body = summary_etag(company_id, session.exec(summary_version_statement(company_id)).one()), None
+
+    not_modified_response = not_modified(if_none_match, etag)
+    if not_modified_response:
+        return not_modified_response
+
+    if body is None:
+        results = session.exec(summary_statement(company_id)).all()
+        body = serialize_summary(results)
+        set_cached_summary(company_id, etag, body)
+        # Un cambio confirmado mientras se leía pudo invalidar antes de este set: se comprueba de nuevo la versión
+        if summary_etag(company_id, session.exec(summary_version_statement(company_id)).one()) != etag:
+            invalidate_catalog(company_id)
+
+    # Se responde el JSON ya serializado (misma forma que List[ProductSummary])
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+# Productos creados, modificados o borrados desde 'since' (sincronización incremental)
+@router.get("/changes", response_model=ProductChanges, summary="Cambios en los productos de una compañìa")
+def list_product_changes(company_id: int = Query(...), since: datetime = Query(...), session: Session = Depends(get_read_session), current_user: dict = Depends(get_current_user)):
+    # Las fechas se guardan en UTC sin zona horaria
+    if since.tzinfo is not None:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+
+    upserted, deleted, cutoff = changes_statements(company_id, since)
+    cutoff = session.exec(cutoff).one()
+    return ORJSONResponse(changes_payload(since, cutoff, session.exec(upserted).all(), session.exec(deleted).all()))
+
+# Exportación masiva de los productos de una compañìa (respuesta en streaming)
+@router.get("/export", summary="Exportar productos de una compañìa")
+def export_company_products(
+    company_id: int = Query(...),
+    format: Literal["ndjson", "csv"] = Query("ndjson"),
+    columns: Optional[str] = Query(None, description="Columnas separadas por coma, p. ej. id,product_code,stock_quantity"),
+    current_user: dict = Depends(get_current_user)):
+
+    selected = project_columns(Products, columns, EXPORT_FIELDS, required=())
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        export_products(company_id, selected, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="products_{company_id}.{format}"'},
     )
-    results = session.exec(statement).all()
-
-    # Mapeo manual a ProductSummary.
-    return [
-        ProductSummary(
-            id=r.id,
-            product_name=r.product_name,
-            category_id=r.category_id,
-            category_name=r.category_name,
-            points_value=r.points_value,
-            image_url=r.image_url
-        )
-        for r in results
-    ]
+
+# Carga masiva de productos (NDJSON o CSV leído en streaming)
+@router.post("/bulk", summary="Carga masiva de productos")
+async def bulk_create_products(
+    request: Request,
+    format: Literal["ndjson", "csv"] = Query("ndjson"),
+    mode: Literal["atomic", "best_effort"] = Query("atomic"),
+    session: Session = Depends(get_session),
+    current_user: dict = Depends(get_current_user)):
+
+    report = await import_products(session, request.stream(), format, atomic=mode == "atomic")
+    if mode == "atomic" and report["errors"]:
+        # No se insertó nada: se devuelve el reporte de errores por fila
+        return JSONResponse(status_code=422, content=report)
+    return report
 
 # Crear producto
 @router.post("/create", response_model=ProductRead, summary="Crear producto")
-def create_product(product: ProductCreate, session: Session = Depends(get_session)):
+def create_product(product: ProductCreate, session: Session = Depends(get_write_session)):
+    # El id llega en el RETURNING del INSERT; sin expirar tras el commit no hace falta refresh
     db_product = Products(**product.dict())
     session.add(db_product)
     session.commit()
-    session.refresh(db_product)
+    invalidate_catalog(db_product.company_id)
     return db_product
 
 # Buscar producto por Id
 @router.get("/{product_id}", response_model=ProductRead, summary="Buscar producto por Id")
-def read_product(product_id: int, session: Session = Depends(get_session),current_user: dict = Depends(get_current_user)):
-    product = session.get(Products, product_id)
-    if not product:
+def read_product(product_id: int, if_none_match: Optional[str] = Header(None), fields: Optional[str] = Query(None, description="Campos separados por coma, p. ej. id,product_name,points_value"), session: Session = Depends(get_read_session), current_user: dict = Depends(get_current_user)):
+    statement = product_fields_statement(product_id, fields)
+    if if_none_match:
+        # Validación condicional: solo se consulta la versión, sin cargar el producto
+        version = session.exec(select(Products.version).where(Products.id == product_id)).first()
+        if version is None:
+            raise HTTPException(status_code=404, detail="Product not found")
+        not_modified_response = not_modified(if_none_match, version_etag(product_id, version))
+        if not_modified_response:
+            return not_modified_response
+    row = session.exec(statement).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Product not found")
-    return product
+    # Solo las columnas pedidas, sin instanciar Products; la fila ya tiene la forma de ProductRead
+    item, etag = row_with_etag(row)
+    return ORJSONResponse(item, headers={"ETag": etag})
 
 # Actualizar producto por Id
 @router.put("/update/{product_id}", response_model=ProductRead, summary="Actualizar datos de un producto")
-def update_product(product_id: int, product_update: ProductUpdate, session: Session = Depends(get_session),current_user: dict = Depends(get_current_user)):
-    product = session.get(Products, product_id)
+def update_product(product_id: int, product_update: ProductUpdate, response: Response, if_match: Optional[str] = Header(None), session: Session = Depends(get_write_session),current_user: dict = Depends(get_current_user)):
+    # If-Match opcional: con él la actualización es condicional a la versión (409 si cambió)
+    version = expected_version(if_match, product_id)
+    product = session.execute(update_product_statement(product_id, product_update.dict(exclude_unset=True), version)).scalar_one_or_none()
     if not product:
+        # Sin fila actualizada: el producto no existe o cambió de versión
+        if version is not None and session.exec(select(Products.id).where(Products.id == product_id)).first():
+            raise version_conflict()
         raise HTTPException(status_code=404, detail="Product not found")
-    product_data = product_update.dict(exclude_unset=True)
-    for key, value in product_data.items():
-        setattr(product, key, value)
-    product.updated_at = datetime.utcnow()
-    session.add(product)
     session.commit()
-    session.refresh(product)
+    response.headers["ETag"] = version_etag(product.id, product.version)
+    invalidate_catalog(product.company_id)
     return product
 
+# Canjear un producto por puntos (descuento de existencias sin bloqueo previo de la fila)
+@router.post("/{product_id}/redeem", response_model=ProductRedemptionRead, status_code=201, summary="Canjear producto por puntos")
+def redeem_product(product_id: int, redeem: ProductRedeem, session: Session = Depends(get_write_session), current_user: dict = Depends(get_current_user)):
+    quote = session.execute(redemption_quote_statement(product_id, redeem.quantity)).first()
+    if quote is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    # Primero el cargo (fila del usuario) y al final el descuento de existencias: la fila del producto,
+    # compartida por todos los canjes, queda bloqueada solo durante la última sentencia y el commit
+    debit = session.execute(apply_points_statement(current_user.id, -quote.points, LedgerReason.REDEMPTION, quote.id)).first()
+    if debit is None:
+        session.rollback()
+        raise HTTPException(status_code=409, detail="Puntos insuficientes")
+    redemption = session.execute(redeem_statement(product_id, current_user.id, redeem.quantity, quote.id, quote.points)).first()
+    if redemption is None:
+        session.rollback()
+        raise HTTPException(status_code=409, detail="Stock insuficiente o el precio del producto cambió")
+    session.commit()
+    return {**redemption._asdict(), "points_balance": debit.balance_after}
+
 # Borrar producto por Id
 @router.delete("/delete/{product_id}", summary="Borrar un producto")
 def delete_product(product_id: int, session: Session = Depends(get_session),current_user: dict = Depends(get_current_user)):
     product = session.get(Products, product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
+    company_id = product.company_id
     session.delete(product)
+    session.add(ProductTombstones(product_id=product_id, company_id=company_id))
     session.commit()
+    invalidate_catalog(company_id)
     return {"ok": True}
 
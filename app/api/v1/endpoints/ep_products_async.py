@@ -0,0 +1,144 @@
+from fastapi import APIRouter, HTTPException, Depends, Query, Response, Header
+from fastapi.responses import ORJSONResponse
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from datetime import datetime, timezone
+from typing import List, Optional
+from app.models.model_product import Products, ProductCreate, ProductRead, ProductUpdate, ProductSummary, ProductTombstones, ProductChanges, ProductRedeem, ProductRedemptionRead
+from app.dependencies.database import get_async_session, get_async_read_session, get_async_write_session
+from app.core.validate_token import get_current_user
+from app.core.versioning import version_etag, expected_version, version_conflict, row_with_etag
+from app.models.model_wallet import LedgerReason
+from app.services.service_wallet import apply_points_statement
+from app.services.service_product import (
+    summary_statement, summary_version_statement, serialize_summary, aget_cached_summary, aset_cached_summary,
+    ainvalidate_catalog, summary_etag, not_modified, update_product_statement, redemption_quote_statement, redeem_statement,
+    product_fields_statement, changes_statements, changes_payload,
+)
+from app.api.v1.endpoints import ep_products
+
+
+# router para los endpoints de productos (modo DB_MODE=async)
+router = APIRouter(prefix="/products", tags=["products"])
+
+# Retorna todos los productos de una compañìa
+@router.get("/summary", response_model=List[ProductSummary], summary="Mostrar productos de una compañìa")
+async def list_products_summary(company_id: int = Query(...), if_none_match: Optional[str] = Header(None), session: AsyncSession = Depends(get_async_session), current_user: dict = Depends(get_current_user)):
+    # Sin caché se lee del primario (sesión perezosa: un acierto no toma conexión); así nunca se
+    # guarda en caché un cuerpo/ETag atrasado de una réplica
+    cached = await aget_cached_summary(company_id)
+    if cached is not None:
+        etag, body = cached
+    else:
+        # El ETag se calcula con una consulta agregada, antes de traer las filas
+        etag, body = summary_etag(company_id, (await session.exec(summary_version_statement(company_id))).one()), None
+
+    not_modified_response = not_modified(if_none_match, etag)
+    if not_modified_response:
+        return not_modified_response
+
+    if body is None:
+        results = (await session.exec(summary_statement(company_id))).all()
+        body = serialize_summary(results)
+        await aset_cached_summary(company_id, etag, body)
+        # Un cambio confirmado mientras se leía pudo invalidar antes de este set: se comprueba de nuevo la versión
+        if summary_etag(company_id, (await session.exec(summary_version_statement(company_id))).one()) != etag:
+            await ainvalidate_catalog(company_id)
+
+    # Se responde el JSON ya serializado (misma forma que List[ProductSummary])
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+# Productos creados, modificados o borrados desde 'since' (sincronización incremental)
+@router.get("/changes", response_model=ProductChanges, summary="Cambios en los productos de una compañìa")
+async def list_product_changes(company_id: int = Query(...), since: datetime = Query(...), session: AsyncSession = Depends(get_async_read_session), current_user: dict = Depends(get_current_user)):
+    # Las fechas se guardan en UTC sin zona horaria
+    if since.tzinfo is not None:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+
+    upserted, deleted, cutoff = changes_statements(company_id, since)
+    cutoff = (await session.exec(cutoff)).one()
+    return ORJSONResponse(changes_payload(since, cutoff, (await session.exec(upserted)).all(), (await session.exec(deleted)).all()))
+
+# Crear producto
+@router.post("/create", response_model=ProductRead, summary="Crear producto")
+async def create_product(product: ProductCreate, session: AsyncSession = Depends(get_async_write_session)):
+    db_product = Products(**product.dict())
+    session.add(db_product)
+    await session.commit()
+    await ainvalidate_catalog(db_product.company_id)
+    return db_product
+
+# Buscar producto por Id
+@router.get("/{product_id}", response_model=ProductRead, summary="Buscar producto por Id")
+async def read_product(product_id: int, if_none_match: Optional[str] = Header(None), fields: Optional[str] = Query(None, description="Campos separados por coma, p. ej. id,product_name,points_value"), session: AsyncSession = Depends(get_async_read_session), current_user: dict = Depends(get_current_user)):
+    statement = product_fields_statement(product_id, fields)
+    if if_none_match:
+        # Validación condicional: solo se consulta la versión, sin cargar el producto
+        version = (await session.exec(select(Products.version).where(Products.id == product_id))).first()
+        if version is None:
+            raise HTTPException(status_code=404, detail="Product not found")
+        not_modified_response = not_modified(if_none_match, version_etag(product_id, version))
+        if not_modified_response:
+            return not_modified_response
+    row = (await session.exec(statement)).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Product not found")
+    # Solo las columnas pedidas, sin instanciar Products; la fila ya tiene la forma de ProductRead
+    item, etag = row_with_etag(row)
+    return ORJSONResponse(item, headers={"ETag": etag})
+
+# Actualizar producto por Id
+@router.put("/update/{product_id}", response_model=ProductRead, summary="Actualizar datos de un producto")
+async def update_product(product_id: int, product_update: ProductUpdate, response: Response, if_match: Optional[str] = Header(None), session: AsyncSession = Depends(get_async_write_session), current_user: dict = Depends(get_current_user)):
+    version = expected_version(if_match, product_id)
+    product = (await session.execute(update_product_statement(product_id, product_update.dict(exclude_unset=True), version))).scalar_one_or_none()
+    if not product:
+        # Sin fila actualizada: el producto no existe o cambió de versión
+        if version is not None and (await session.exec(select(Products.id).where(Products.id == product_id))).first():
+            raise version_conflict()
+        raise HTTPException(status_code=404, detail="Product not found")
+    await session.commit()
+    response.headers["ETag"] = version_etag(product.id, product.version)
+    await ainvalidate_catalog(product.company_id)
+    return product
+
+# Canjear un producto por puntos
+@router.post("/{product_id}/redeem", response_model=ProductRedemptionRead, status_code=201, summary="Canjear producto por puntos")
+async def redeem_product(product_id: int, redeem: ProductRedeem, session: AsyncSession = Depends(get_async_write_session), current_user: dict = Depends(get_current_user)):
+    quote = (await session.execute(redemption_quote_statement(product_id, redeem.quantity))).first()
+    if quote is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    # Primero el cargo (fila del usuario) y al final el descuento de existencias: la fila del producto,
+    # compartida por todos los canjes, queda bloqueada solo durante la última sentencia y el commit
+    debit = (await session.execute(apply_points_statement(current_user.id, -quote.points, LedgerReason.REDEMPTION, quote.id))).first()
+    if debit is None:
+        await session.rollback()
+        raise HTTPException(status_code=409, detail="Puntos insuficientes")
+    redemption = (await session.execute(redeem_statement(product_id, current_user.id, redeem.quantity, quote.id, quote.points))).first()
+    if redemption is None:
+        await session.rollback()
+        raise HTTPException(status_code=409, detail="Stock insuficiente o el precio del producto cambió")
+    await session.commit()
+    return {**redemption._asdict(), "points_balance": debit.balance_after}
+
+# Borrar producto por Id
+@router.delete("/delete/{product_id}", summary="Borrar un producto")
+async def delete_product(product_id: int, session: AsyncSession = Depends(get_async_session), current_user: dict = Depends(get_current_user)):
+    product = await session.get(Products, product_id)
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+    company_id = product.company_id
+    await session.delete(product)
+    session.add(ProductTombstones(product_id=product_id, company_id=company_id))
+    await session.commit()
+    await ainvalidate_catalog(company_id)
+    return {"ok": True}
+
+
+# Los endpoints que no tienen versión asíncrona se reutilizan de ep_products
+_async_routes = {(route.path, method) for route in router.routes for method in route.methods}
+# (se anteponen para que las rutas estáticas no queden detrás de /{product_id})
+router.routes[:0] = [
+    route for route in ep_products.router.routes
+    if not any((route.path, method) in _async_routes for method in route.methods)
+]
@@ -1,17 +1,23 @@
+import logging
 from datetime import datetime, timedelta
-from fastapi import APIRouter, Depends, HTTPException, Path, Query, Security, status
-from fastapi.responses import HTMLResponse
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, Query, Response, Security, status
+from fastapi.responses import HTMLResponse, ORJSONResponse
 from sqlmodel import Session, select
 from typing import List, Annotated, Optional
 from fastapi.security import OAuth2PasswordBearer
+from starlette.concurrency import run_in_threadpool
 
 
-from app.core.auth import create_access_token, hash_password
+from app.core.auth import create_access_token, user_token_claims, hash_password, averify_password
+from app.core.config import settings
+from app.core.versioning import version_etag, expected_version
 from app.core.validate_token import get_current_user, validate_token_payload
-from app.dependencies.database import get_session
+from app.dependencies.database import get_session, get_read_session, get_write_session
 from app.models.model_user import User, LoginRequest
-from app.schemas.schema_user import userCreate, userUpdate, userPublic, LoginRequestOut
-from app.services.service_user import create_user, get_user_by_email, update_user, get_users, get_user_id, get_user_by_phone
+from app.schemas.schema_user import userCreate, userUpdate, userPublic, userPublicFields, userPage, LoginRequestOut
+from app.services.service_user import create_user, create_user_conflict, update_user, get_users, get_user_fields
+
+logger = logging.getLogger(__name__)
 
 # router para los endpoints de user
 router = APIRouter(prefix="/users", tags=["users"])
@@ -26,72 +32,82 @@ def create_new_user(user_create: userCreate, db: Session = Depends(get_session),
     if current_user.role != "SYSTEM_USER":
         raise HTTPException(status_code=403, detail="Access forbidden: Insufficient role")
 
-    # Verificar si el usuario ya existe
-    existing_user = db.query(User).filter(User.username == user_create.username).first()
-    if existing_user:
-        raise HTTPException(status_code=400, detail="Username already registered")
-
     # Hashear la contraseña del nuevo usuario
     user_create.password_hash = hash_password(user_create.password_hash)
 
+    # Un solo INSERT ... ON CONFLICT DO NOTHING: los duplicados los detectan los índices únicos
     new_user = create_user(db, user_create)
+    if new_user is None:
+        # Se consulta qué campo único está ocupado para informarlo
+        raise create_user_conflict(db, user_create)
 
     return new_user
 
 
 #Obtener una cuenta por email**
-@router.get("/users/email/{email}", response_model=userPublic, summary="Buscar usuario por email")
+@router.get("/users/email/{email}", response_model=userPublicFields, summary="Buscar usuario por email")
 def get_user_email(
     email: str, 
-    db: Session = Depends(get_session), 
-    current_user: dict = Depends(get_current_user)):
-    db_user = get_user_by_email(db, email)
-    if not db_user:
+    db: Session = Depends(get_read_session), 
+    current_user: dict = Depends(get_current_user),
+    fields: Optional[str] = Query(None, description="Campos separados por coma, p. ej. id,username,email")):
+    found = get_user_fields(db, User.email == email, fields)
+    if not found:
         raise HTTPException(status_code=404, detail="user not found")
-    return db_user
+    return ORJSONResponse(found[0])
 
 
 #Obtener una cuenta por nùmero celular**
-@router.get("/users/phone/{phone}", response_model=userPublic, summary="Buscar usuario por nùmero celular")
+@router.get("/users/phone/{phone}", response_model=userPublicFields, summary="Buscar usuario por nùmero celular")
 def get_user_phone(
     phone: str, 
-    db: Session = Depends(get_session), 
-    current_user: dict = Depends(get_current_user)):
-    db_user = get_user_by_phone(db, phone)
-    if not db_user:
+    db: Session = Depends(get_read_session), 
+    current_user: dict = Depends(get_current_user),
+    fields: Optional[str] = Query(None, description="Campos separados por coma, p. ej. id,username,email")):
+    found = get_user_fields(db, User.phone_number == phone, fields)
+    if not found:
         raise HTTPException(status_code=404, detail="user not found")
-    return db_user
+    return ORJSONResponse(found[0])
 
 
 #Consulta una cuenta por Id
-@router.get("/users/{user_id}", response_model=userPublic, summary="Buscar usuario por ID")
+@router.get("/users/{user_id}", response_model=userPublicFields, summary="Buscar usuario por ID")
 def read_user(
     user_id: int, 
-    db: Session = Depends(get_session),
-    current_user: dict = Depends(get_current_user)):
+    db: Session = Depends(get_read_session),
+    current_user: dict = Depends(get_current_user),
+    fields: Optional[str] = Query(None, description="Campos separados por coma, p. ej. id,username,email")):
     
-    user = get_user_id(db, user_id)
-    if not user:
+    found = get_user_fields(db, User.id == user_id, fields)
+    if not found:
         raise HTTPException(status_code=404, detail="user not found")
-    return user
+    # La fila ya tiene la forma de userPublic (o del subconjunto pedido): se codifica sin revalidarla
+    item, etag = found
+    return ORJSONResponse(item, headers={"ETag": etag})
 
 
-# Consulta todas las cuentas
-@router.get("/users", response_model=list[userPublic], summary="Consultar todos los usuarios")
+# Consulta todas las cuentas (paginado por cursor, con proyección opcional de campos)
+@router.get("/users", response_model=userPage, response_model_exclude_unset=True, summary="Consultar todos los usuarios")
 def read_users(
-    db: Session = Depends(get_session), 
-    current_user: dict = Depends(get_current_user), 
-    offset: int = 0, limit: Annotated[int, Query(le=100)] = 100):
-    
-    return get_users(db, offset, limit)
+    db: Session = Depends(get_read_session),
+    current_user: dict = Depends(get_current_user),
+    cursor: Optional[str] = None,
+    limit: Annotated[int, Query(ge=1, le=settings.PAGE_MAX_LIMIT)] = settings.PAGE_MAX_LIMIT,
+    fields: Optional[str] = Query(None, description="Campos separados por coma, p. ej. id,username,email")):
+
+    items, next_cursor = get_users(db, cursor, limit, fields)
+    # Las filas ya tienen la forma de userPage: se codifican directamente, sin revalidarlas
+    return ORJSONResponse({"items": items, "next_cursor": next_cursor})
 
 
 #Actualizar una cuenta de usuario**
 @router.put("/update/{user_id}", response_model=userPublic, summary="Actualizar datos de usuario")
-def update_existing_user(user_id: int, user_update: userUpdate, db: Session = Depends(get_session)):
-    db_user = update_user(db, user_id, user_update)
+def update_existing_user(user_id: int, user_update: userUpdate, response: Response, if_match: Optional[str] = Header(None), db: Session = Depends(get_write_session)):
+    # If-Match opcional: con él la actualización es condicional a la versión (409 si cambió)
+    db_user = update_user(db, user_id, user_update, expected_version(if_match, user_id))
     if db_user is None:
         raise HTTPException(status_code=404, detail="user not found")
+    response.headers["ETag"] = version_etag(db_user.id, db_user.version)
     return db_user
 
 
@@ -100,20 +116,19 @@ def update_existing_user(user_id: int, user_update: userUpdate, db: Session = De
 async def login( request: LoginRequest, db: Session = Depends(get_session), app_auth_token: Optional[str] = Security(oauth2_scheme, scopes=[]),):
     
     statement = select(User).where(User.username == request.username)
-    db_user = db.exec(statement).first()
+    db_user = await run_in_threadpool(lambda: db.exec(statement).first())
 
     if not db_user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Usuario no encontrado")
 
-    if not db_user.verify_password(request.password):
+    if not await averify_password(request.password, db_user.password_hash):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Contraseña incorrecta")
     
     if not db_user.status == 1:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Usuario Inactivo o bloqueado")
     
     """ if not db_user.email_verify == 1:
-        user = User(**db_user.__dict__)
-        await send_email(user)  
+        await send_email(db, db_user)  
         raise HTTPException(status_code=status.HTTP_202_ACCEPTED, detail="Por favor verifica tu correo para poder acceder") """
 
     # --- Validación específica para APP_USER (con token del header) ---
@@ -131,18 +146,18 @@ async def login( request: LoginRequest, db: Session = Depends(get_session), app_
             
         except HTTPException as e:
             # Re-lanza la excepción si tu función validate_token_payload ya maneja los errores
-            print(f"ERROR: Falló la validación del token de aplicación: {e.detail}")
+            logger.warning("Falló la validación del token de aplicación: %s", e.detail)
             raise e
 
         except Exception as e:
             # Captura cualquier otro error inesperado durante la validación
-            print(f"ERROR INESPERADO: {e}")
+            logger.exception("Error inesperado al validar el token de aplicación")
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Error inesperado al validar el token de aplicación: {e}"
             )
             
-            print(f"Token de aplicación (APP_USER) presente y validado (DEBUG): {app_auth_token[:20]}...")
+            logger.debug("Token de aplicación (APP_USER) presente y validado")
     
     # --- Validación final del rol (existente) ---
     if request.rol != db_user.role:
@@ -152,7 +167,7 @@ async def login( request: LoginRequest, db: Session = Depends(get_session), app_
         )
 
     # --- Generación y retorno del token de acceso para el usuario ---
-    access_token = create_access_token(data={"sub": db_user.username, "role": db_user.role})
+    access_token = create_access_token(user_token_claims(db_user))
     return {"message": "Usuario autenticado exitosamente", "user": LoginRequestOut.from_orm(db_user)}
     
 
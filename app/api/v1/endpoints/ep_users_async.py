@@ -0,0 +1,98 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import ORJSONResponse
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import Annotated, Optional
+
+from app.core.auth import ahash_password
+from app.core.config import settings
+from app.core.versioning import version_etag, expected_version
+from app.core.validate_token import get_current_user
+from app.dependencies.database import get_async_session, get_async_read_session, get_async_write_session
+from app.models.model_user import User
+from app.schemas.schema_user import userCreate, userUpdate, userPublic, userPublicFields, userPage
+from app.services.service_user_async import create_user, create_user_conflict, update_user, get_users, get_user_fields
+from app.api.v1.endpoints import ep_users
+
+# router para los endpoints de user (modo DB_MODE=async)
+router = APIRouter(prefix="/users", tags=["users"])
+
+
+#Crear una cuenta de usuario
+@router.post("/create", response_model=userPublic, status_code=201, summary="Crear usuario")
+async def create_new_user(user_create: userCreate, db: AsyncSession = Depends(get_async_session), current_user: dict = Depends(get_current_user),):
+
+    if current_user.role != "SYSTEM_USER":
+        raise HTTPException(status_code=403, detail="Access forbidden: Insufficient role")
+
+    # Hashear la contraseña del nuevo usuario
+    user_create.password_hash = await ahash_password(user_create.password_hash)
+
+    # Un solo INSERT ... ON CONFLICT DO NOTHING: los duplicados los detectan los índices únicos
+    new_user = await create_user(db, user_create)
+    if new_user is None:
+        # Se consulta qué campo único está ocupado para informarlo
+        raise await create_user_conflict(db, user_create)
+
+    return new_user
+
+
+#Obtener una cuenta por email**
+@router.get("/users/email/{email}", response_model=userPublicFields, summary="Buscar usuario por email")
+async def get_user_email(email: str, db: AsyncSession = Depends(get_async_read_session), current_user: dict = Depends(get_current_user), fields: Optional[str] = Query(None, description="Campos separados por coma, p. ej. id,username,email")):
+    found = await get_user_fields(db, User.email == email, fields)
+    if not found:
+        raise HTTPException(status_code=404, detail="user not found")
+    return ORJSONResponse(found[0])
+
+
+#Obtener una cuenta por nùmero celular**
+@router.get("/users/phone/{phone}", response_model=userPublicFields, summary="Buscar usuario por nùmero celular")
+async def get_user_phone(phone: str, db: AsyncSession = Depends(get_async_read_session), current_user: dict = Depends(get_current_user), fields: Optional[str] = Query(None, description="Campos separados por coma, p. ej. id,username,email")):
+    found = await get_user_fields(db, User.phone_number == phone, fields)
+    if not found:
+        raise HTTPException(status_code=404, detail="user not found")
+    return ORJSONResponse(found[0])
+
+
+#Consulta una cuenta por Id
+@router.get("/users/{user_id}", response_model=userPublicFields, summary="Buscar usuario por ID")
+async def read_user(user_id: int, db: AsyncSession = Depends(get_async_read_session), current_user: dict = Depends(get_current_user), fields: Optional[str] = Query(None, description="Campos separados por coma, p. ej. id,username,email")):
+    found = await get_user_fields(db, User.id == user_id, fields)
+    if not found:
+        raise HTTPException(status_code=404, detail="user not found")
+    # La fila ya tiene la forma de userPublic (o del subconjunto pedido): se codifica sin revalidarla
+    item, etag = found
+    return ORJSONResponse(item, headers={"ETag": etag})
+
+
+# Consulta todas las cuentas (paginado por cursor, con proyección opcional de campos)
+@router.get("/users", response_model=userPage, response_model_exclude_unset=True, summary="Consultar todos los usuarios")
+async def read_users(
+    db: AsyncSession = Depends(get_async_read_session),
+    current_user: dict = Depends(get_current_user),
+    cursor: Optional[str] = None,
+    limit: Annotated[int, Query(ge=1, le=settings.PAGE_MAX_LIMIT)] = settings.PAGE_MAX_LIMIT,
+    fields: Optional[str] = Query(None, description="Campos separados por coma, p. ej. id,username,email")):
+
+    items, next_cursor = await get_users(db, cursor, limit, fields)
+    # Las filas ya tienen la forma de userPage: se codifican directamente, sin revalidarlas
+    return ORJSONResponse({"items": items, "next_cursor": next_cursor})
+
+
+#Actualizar una cuenta de usuario**
+@router.put("/update/{user_id}", response_model=userPublic, summary="Actualizar datos de usuario")
+async def update_existing_user(user_id: int, user_update: userUpdate, response: Response, if_match: Optional[str] = Header(None), db: AsyncSession = Depends(get_async_write_session)):
+    db_user = await update_user(db, user_id, user_update, expected_version(if_match, user_id))
+    if db_user is None:
+        raise HTTPException(status_code=404, detail="user not found")
+    response.headers["ETag"] = version_etag(db_user.id, db_user.version)
+    return db_user
+
+
+# Los endpoints que no tienen versión asíncrona (login, verificación de email...) se reutilizan de ep_users
+_async_routes = {(route.path, method) for route in router.routes for method in route.methods}
+# (se anteponen para que las rutas estáticas no queden detrás de /{id})
+router.routes[:0] = [
+    route for route in ep_users.router.routes
+    if not any((route.path, method) in _async_routes for method in route.methods)
+]
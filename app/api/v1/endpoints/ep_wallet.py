@@ -0,0 +1,60 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+from sqlmodel import Session
+from typing import Annotated, Optional
+
+from app.core.config import settings
+from app.core.validate_token import get_current_user
+from app.dependencies.database import get_read_session, get_write_session
+from app.models.model_user import User
+from app.models.model_wallet import WalletRead, PointsCredit, LedgerEntryRead, LedgerPage
+from app.services.service_wallet import apply_points_statement, get_wallet, get_ledger
+
+# router para el monedero de puntos de los usuarios
+router = APIRouter(prefix="/users", tags=["wallet"])
+
+
+# Solo el propio usuario o un usuario de sistema pueden ver el monedero
+def _check_access(user_id: int, current_user):
+    if current_user.id != user_id and current_user.role != "SYSTEM_USER":
+        raise HTTPException(status_code=403, detail="Access forbidden: Insufficient role")
+
+
+# Saldo de puntos de un usuario
+@router.get("/{user_id}/wallet", response_model=WalletRead, summary="Consultar saldo de puntos")
+def read_wallet(user_id: int, db: Session = Depends(get_read_session), current_user: dict = Depends(get_current_user)):
+    _check_access(user_id, current_user)
+    wallet = get_wallet(db, user_id)
+    if wallet is None:
+        # Sin movimientos todavía: saldo cero si el usuario existe
+        if db.get(User, user_id) is None:
+            raise HTTPException(status_code=404, detail="user not found")
+        return WalletRead(user_id=user_id, balance=0)
+    return wallet
+
+
+# Movimientos de puntos de un usuario (paginado por cursor)
+@router.get("/{user_id}/wallet/ledger", response_model=LedgerPage, summary="Consultar movimientos de puntos")
+def read_ledger(
+    user_id: int,
+    db: Session = Depends(get_read_session),
+    current_user: dict = Depends(get_current_user),
+    cursor: Optional[str] = None,
+    limit: Annotated[int, Query(ge=1, le=settings.PAGE_MAX_LIMIT)] = settings.PAGE_MAX_LIMIT):
+
+    _check_access(user_id, current_user)
+    items, next_cursor = get_ledger(db, user_id, cursor, limit)
+    # Las filas ya tienen la forma de LedgerPage: se codifican directamente, sin revalidarlas
+    return ORJSONResponse({"items": items, "next_cursor": next_cursor})
+
+
+# Abonar puntos a un usuario
+@router.post("/{user_id}/wallet/credit", response_model=LedgerEntryRead, status_code=201, summary="Abonar puntos")
+def credit_points(user_id: int, credit: PointsCredit, db: Session = Depends(get_write_session), current_user: dict = Depends(get_current_user)):
+    if current_user.role != "SYSTEM_USER":
+        raise HTTPException(status_code=403, detail="Access forbidden: Insufficient role")
+    if db.get(User, user_id) is None:
+        raise HTTPException(status_code=404, detail="user not found")
+    entry = db.execute(apply_points_statement(user_id, credit.amount, credit.reason)).first()
+    db.commit()
+    return entry._asdict()
@@ -1,14 +1,23 @@
+import logging
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlmodel import Session, select
+from starlette.concurrency import run_in_threadpool
 
-from app.core.auth import create_access_token
+from jose import JWTError
+from app.core.auth import create_access_token, create_user_tokens, user_token_claims, averify_password, ACCESS_TOKEN_EXPIRE_MINUTES
+from app.core.keys import key_ring
+from app.core.validate_token import oauth2_scheme
+from app.core.revocation import revocation_store
 from app.dependencies.database import get_session
 from app.models.model_user import LoginRequest,User
-from app.schemas.schema_user import LoginRequestOut
+from app.schemas.schema_user import LoginRequestOut, LogoutRequest, RefreshRequest
 from app.services.service_user import send_email
 
 from app.services.service_user import authenticate_user
 
+logger = logging.getLogger(__name__)
+
 # router para los endpoints de user
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -16,27 +25,69 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 async def login(request: LoginRequest, db: Session = Depends(get_session)):
     # Buscar el usuario en la base de datos
     statement = select(User).where(User.username  == request.username)
-    db_user = db.exec(statement).first()
+    db_user = await run_in_threadpool(lambda: db.exec(statement).first())
 
     if not db_user:
-        print("Usuario no encontrado.")
+        logger.info("Login rechazado: usuario no encontrado")
         raise HTTPException(status_code=401, detail="Usuario no encontrado")
 
-    if not db_user.verify_password(request.password):
+    if not await averify_password(request.password, db_user.password_hash):
         raise HTTPException(status_code=402, detail="Contraseña incorrecta")
     
     if not db_user.status == 1:
-        print("Usuario inactivo.")
+        logger.info("Login rechazado: usuario inactivo (%s)", db_user.username)
         raise HTTPException(status_code=402, detail="Usuario Inactivo o bloqueado")
     
     if not db_user.email_verify == 1:
-        user = User(**db_user.__dict__)
-        await send_email(user)  
+        await send_email(db, db_user)  
         raise HTTPException(status_code=202, detail="Por favor verifica tu correo para poder acceder")
 
     if db_user.role not in ("SYSTEM_USER" , "APP_USER"):
         raise HTTPException(status_code=403, detail="Acceso denegado, role inválido")
 
-    access_token = create_access_token(data={"sub": db_user.username, "role": db_user.role})
-    
-    return {"access_token": access_token, "token_type": "bearer", "user": LoginRequestOut.from_orm(db_user)}
+    # Access token corto con rol y estado + refresh token para renovarlo
+    tokens = create_user_tokens(db_user)
+
+    return {**tokens, "user": LoginRequestOut.from_orm(db_user)}
+
+
+# Renovar el access token: única consulta a la BD para comprobar que el usuario sigue activo
+@router.post("/refresh")
+def refresh(request: RefreshRequest, db: Session = Depends(get_session)):
+    try:
+        payload = key_ring.decode(request.refresh_token)
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Refresh token inválido o expirado")
+    if payload.get("typ") != "refresh" or payload.get("exp") is None or revocation_store.is_revoked(payload):
+        raise HTTPException(status_code=401, detail="Refresh token inválido o expirado")
+
+    db_user = db.get(User, payload.get("uid"))
+    if db_user is None or db_user.username != payload.get("sub") or db_user.status != 1:
+        raise HTTPException(status_code=401, detail="Usuario Inactivo o bloqueado")
+
+    return {
+        "access_token": create_access_token(user_token_claims(db_user)),
+        "token_type": "bearer",
+        "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    }
+
+
+# Cerrar sesión: revoca el access token recibido y, si se envía, el refresh token asociado
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(request: Optional[LogoutRequest] = None, token: str = Depends(oauth2_scheme), db: Session = Depends(get_session)):
+    try:
+        # El access token puede haber caducado: se comprueba la firma pero no la expiración,
+        # así el refresh token se puede revocar aunque el cliente ya no tenga un access token vigente
+        payloads = [key_ring.decode(token, options={"verify_exp": False})]
+        if request is not None and request.refresh_token:
+            payloads.append(key_ring.decode(request.refresh_token))
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Token inválido o expirado")
+    if any(not payload.get("jti") or payload.get("sub") != payloads[0].get("sub") for payload in payloads):
+        raise HTTPException(status_code=400, detail="Token sin identificador o de otro usuario")
+
+    for payload in payloads:
+        db.execute(revocation_store.revoke_token_statement(payload["jti"], payload["sub"], payload["exp"]))
+    db.commit()
+    for payload in payloads:
+        revocation_store.remember_token(payload["jti"])
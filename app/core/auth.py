@@ -1,49 +1,84 @@
-from datetime import datetime, timedelta
+import time
+import uuid
+from datetime import timedelta
 from typing import Optional
-from jose import JWTError, jwt
+from jose import JWTError
 from passlib.context import CryptContext
 from app.core.config import settings
-from datetime import timedelta
+from app.core.keys import key_ring
+from app.core.password_pool import password_pool
 
 
-# Clave secreta (mejor cargar desde variables de entorno)
-APP_TOKEN_SECRET_KEY = settings.TOKEN_GLUM.encode("utf-8")
-APP_TOKEN_ALGORITHM = settings.ALGORITM
+# Las claves de firma están en app.core.keys (HMAC con TOKEN_GLUM o asimétricas con kid)
 ACCESS_TOKEN_EXPIRE_MINUTES = int(settings.TIME_EXP_WSGLUM)  # Duración del token en minutos
+REFRESH_TOKEN_EXPIRE_DAYS = settings.REFRESH_TOKEN_EXPIRE_DAYS
 
 # Configurar hashing de contraseñas con bcrypt
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
-# Función para crear un nuevo JWT
+# Función para crear un nuevo JWT (access token de vida corta)
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
-    #if expires_delta:
-    #    expire = datetime.utcnow() + expires_delta
-    #else:
-    #   expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    
-    #to_encode["exp"] = expire
-    #to_encode.update({"exp": int(expire.timestamp())})
-    encoded_jwt = jwt.encode(to_encode, APP_TOKEN_SECRET_KEY, APP_TOKEN_ALGORITHM)
-    #encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    now = int(time.time())
+    expire = now + int((expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)).total_seconds())
+    to_encode.update({"iat": now, "exp": expire, "jti": uuid.uuid4().hex, "typ": "access"})
+    encoded_jwt = key_ring.sign(to_encode)
     return encoded_jwt
 
 
+# Refresh token: solo sirve para pedir nuevos access tokens en /auth/refresh
+def create_refresh_token(data: dict):
+    now = int(time.time())
+    to_encode = {**data, "iat": now, "exp": now + REFRESH_TOKEN_EXPIRE_DAYS * 86400, "jti": uuid.uuid4().hex, "typ": "refresh"}
+    return key_ring.sign(to_encode)
+
+
+def user_token_claims(user) -> dict:
+    """Claims del usuario que viajan en el access token (evitan consultar la BD en cada petición)"""
+    return {"sub": user.username, "uid": user.id, "role": getattr(user.role, "value", user.role), "status": user.status}
+
+
+def create_user_tokens(user) -> dict:
+    return {
+        "access_token": create_access_token(user_token_claims(user)),
+        "refresh_token": create_refresh_token({"sub": user.username, "uid": user.id}),
+        "token_type": "bearer",
+        "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    }
+
+
+# Funciones de bcrypt ejecutadas dentro del pool (deben ser de nivel de módulo para el pool de procesos)
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
 def hash_password(password: str) -> str:
     """Devuelve la contraseña hasheada"""
-    return pwd_context.hash(password)
+    return password_pool.run(_hash, password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verifica si la contraseña ingresada coincide con la almacenada"""
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_pool.run(_verify, plain_password, hashed_password)
+
+
+async def ahash_password(password: str) -> str:
+    """Versión asíncrona de hash_password, no bloquea el event loop"""
+    return await password_pool.run_async(_hash, password)
+
+
+async def averify_password(plain_password: str, hashed_password: str) -> bool:
+    """Versión asíncrona de verify_password, no bloquea el event loop"""
+    return await password_pool.run_async(_verify, plain_password, hashed_password)
 
 
 # Función para decodificar el JWT
 def decode_access_token(token: str):
     try:
-        payload = jwt.decode(token, APP_TOKEN_SECRET_KEY, algorithms=[APP_TOKEN_ALGORITHM])
-        
-        return payload
+        return key_ring.decode(token)
     except JWTError:
         return None
\ No newline at end of file
@@ -0,0 +1,117 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class TTLCache:
+    """Cache en memoria acotado por tamaño (LRU) y por tiempo de vida (TTL)."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            # Expulsar las entradas menos usadas si se supera el tamaño máximo
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> Any:
+        with self._lock:
+            item = self._data.pop(key, None)
+        return item[1] if item else None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+class LocalCacheBackend:
+    """Backend de cache en el proceso (cada worker tiene su copia)"""
+
+    blocking = False
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._cache.get(key)
+
+    def set(self, key: str, value: bytes) -> None:
+        self._cache.set(key, value)
+
+    def delete(self, key: str) -> None:
+        self._cache.pop(key)
+
+    def stats(self) -> dict:
+        return {"backend": "local", **self._cache.stats()}
+
+
+class RedisCacheBackend:
+    """Backend compartido entre workers; el límite LRU lo aplica Redis (maxmemory-policy allkeys-lru).
+
+    El cliente es síncrono: desde código asíncrono se llama en el threadpool (`blocking`).
+    """
+
+    blocking = True
+
+    def __init__(self, url: str, ttl: float, prefix: str):
+        import redis  # Dependencia opcional, solo necesaria con este backend
+
+        self._client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        value = self._client.get(self.prefix + key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: bytes) -> None:
+        self._client.set(self.prefix + key, value, ex=int(self.ttl))
+
+    def delete(self, key: str) -> None:
+        self._client.delete(self.prefix + key)
+
+    def stats(self) -> dict:
+        return {"backend": "redis", "hits": self.hits, "misses": self.misses}
+
+
+def build_cache_backend(kind: str, maxsize: int, ttl: float, url: Optional[str] = None, prefix: str = ""):
+    if kind == "redis":
+        return RedisCacheBackend(url, ttl=ttl, prefix=prefix)
+    return LocalCacheBackend(maxsize=maxsize, ttl=ttl)
@@ -12,13 +12,70 @@ class Settings:
     TOKEN_GLUM: str = os.getenv('TOKEN_GLUM')
     TIME_EXP_WSGLUM: str = os.getenv('TIME_EXP_WSGLUM')
     ALGORITM: str = os.getenv('ALGORITM')
+    REFRESH_TOKEN_EXPIRE_DAYS: int = int(os.getenv('REFRESH_TOKEN_EXPIRE_DAYS', 7))
+    REVOCATION_FILTER: str = os.getenv('REVOCATION_FILTER', 'set')  # 'set' (exacto) o 'bloom' (compacto, confirma aciertos en BD)
+    REVOCATION_SYNC_SECONDS: float = float(os.getenv('REVOCATION_SYNC_SECONDS', 5))  # Cada cuánto se traen revocaciones nuevas
+    REVOCATION_REBUILD_SECONDS: float = float(os.getenv('REVOCATION_REBUILD_SECONDS', 3600))  # Reconstrucción sin las caducadas
+    REVOCATION_BLOOM_CAPACITY: int = int(os.getenv('REVOCATION_BLOOM_CAPACITY', 1000000))
+    REVOCATION_BLOOM_ERROR_RATE: float = float(os.getenv('REVOCATION_BLOOM_ERROR_RATE', 0.001))
+    JWT_KEYS_DIR: str = os.getenv('JWT_KEYS_DIR')  # Claves PEM '<kid>.pem' (privada) o '<kid>.pub.pem' (solo verificación)
+    JWT_ACTIVE_KID: str = os.getenv('JWT_ACTIVE_KID')  # kid con el que se firman los tokens nuevos
+    JWT_ASYMMETRIC_ALG: str = os.getenv('JWT_ASYMMETRIC_ALG', 'ES256')  # ES256/ES384/RS256
+    JWT_ACCEPT_HMAC: bool = os.getenv('JWT_ACCEPT_HMAC', 'true').lower() == 'true'  # Aceptar tokens HS firmados con TOKEN_GLUM
+    JWKS_MAX_AGE: int = int(os.getenv('JWKS_MAX_AGE', 300))  # Cache-Control de /.well-known/jwks.json
     USER_EMAIL_NOTIFICATIONS: str = os.getenv('USER_EMAIL_NOTIFICATIONS')
     PASSWORD_EMAIL_NOTIFICATIONS: str = os.getenv('PASSWORD_EMAIL_NOTIFICATIONS')
     MAIL_HOST: str = os.getenv('MAIL_HOST')
     MAIL_PORT: str = os.getenv('MAIL_PORT')
+    MAIL_USE_TLS: bool = os.getenv('MAIL_USE_TLS', 'true').lower() == 'true'  # STARTTLS (desactivar solo con un SMTP local)
+    OUTBOX_ENABLED: bool = os.getenv('OUTBOX_ENABLED', 'true').lower() == 'true'  # Despachador de correos en segundo plano
+    OUTBOX_BATCH_SIZE: int = int(os.getenv('OUTBOX_BATCH_SIZE', 50))
+    OUTBOX_POLL_SECONDS: float = float(os.getenv('OUTBOX_POLL_SECONDS', 2))
+    OUTBOX_MAX_ATTEMPTS: int = int(os.getenv('OUTBOX_MAX_ATTEMPTS', 8))
+    OUTBOX_BACKOFF_SECONDS: int = int(os.getenv('OUTBOX_BACKOFF_SECONDS', 30))  # Espera base, se duplica en cada reintento
+    # Tiempo que un lote reservado queda en SENDING; si el worker muere, otro lo retoma al vencer
+    OUTBOX_LEASE_SECONDS: int = int(os.getenv('OUTBOX_LEASE_SECONDS', 300))
+    WALLET_RECONCILE_SECONDS: float = float(os.getenv('WALLET_RECONCILE_SECONDS', 3600))  # Conciliación saldo/ledger (0 la desactiva)
+    DB_POOL_SIZE: int = int(os.getenv('DB_POOL_SIZE', 5))  # Conexiones permanentes por worker
+    DB_MAX_OVERFLOW: int = int(os.getenv('DB_MAX_OVERFLOW', 10))  # Conexiones extra bajo carga
+    DB_POOL_TIMEOUT: float = float(os.getenv('DB_POOL_TIMEOUT', 30))  # Segundos de espera máxima por una conexión
+    DB_POOL_RECYCLE: int = int(os.getenv('DB_POOL_RECYCLE', 1800))  # Segundos de vida de una conexión (-1 sin límite)
+    DB_POOL_PRE_PING: bool = os.getenv('DB_POOL_PRE_PING', 'false').lower() == 'true'
+    DB_POOL_WARMUP: int = int(os.getenv('DB_POOL_WARMUP', 0))  # Conexiones a abrir al arrancar el worker
+    DB_REPLICA_URLS: list = [url.strip() for url in os.getenv('DB_REPLICA_URLS', '').split(',') if url.strip()]  # Réplicas de solo lectura
+    # Read-your-writes: tras confirmar una escritura, las lecturas de ese cliente van al primario durante
+    # estos segundos, en cualquier worker. El marcador viaja en la cookie glum_ryw y en el header
+    # X-Read-Your-Writes (los clientes sin cookies deben reenviarlo). Solo cubre a clientes que lo devuelven
+    # y supone que el retraso de las réplicas (y el desfase de reloj entre servidores) es menor que este plazo.
+    DB_READ_YOUR_WRITES_SECONDS: float = float(os.getenv('DB_READ_YOUR_WRITES_SECONDS', 5))
+    DB_REPLICA_EJECT_SECONDS: float = float(os.getenv('DB_REPLICA_EJECT_SECONDS', 30))  # Tiempo fuera de una réplica con errores
+    # 'sync' (threadpool) o 'async' (asyncpg). En modo async se sirven con AsyncSession los endpoints de
+    # usuarios y productos con variante asíncrona; /products/export y /products/bulk (sesión propia en
+    # streaming), el monedero, /auth/* y la validación del token siguen en el motor síncrono, así que
+    # ambos pools existen (y se precalientan) en este modo
+    DB_MODE: str = os.getenv('DB_MODE', 'sync')
+    DB_AUTO_CREATE: bool = os.getenv('DB_AUTO_CREATE', 'false').lower() == 'true'  # create_all al arrancar (solo desarrollo)
+    DB_SCHEMA_CHECK: str = os.getenv('DB_SCHEMA_CHECK', 'off')  # 'off', 'warn' o 'strict': compara la versión de migraciones al arrancar
+    CATALOG_CACHE_BACKEND: str = os.getenv('CATALOG_CACHE_BACKEND', 'local')  # 'local' o 'redis'
+    CATALOG_CACHE_URL: str = os.getenv('CATALOG_CACHE_URL')  # p. ej. redis://localhost:6379/0
+    CATALOG_CACHE_MAXSIZE: int = int(os.getenv('CATALOG_CACHE_MAXSIZE', 1000))  # Compañías en cache (backend local)
+    CATALOG_CACHE_TTL: int = int(os.getenv('CATALOG_CACHE_TTL', 300))
+    CHANGES_SAFETY_LAG_SECONDS: float = float(os.getenv('CHANGES_SAFETY_LAG_SECONDS', 30))  # Margen del watermark de /products/changes: mayor que la transacción más larga y que el retraso de las réplicas
+    EXPORT_BATCH_SIZE: int = int(os.getenv('EXPORT_BATCH_SIZE', 1000))  # Filas por lote del cursor de servidor
+    BULK_BATCH_SIZE: int = int(os.getenv('BULK_BATCH_SIZE', 500))  # Filas por INSERT multi-fila en la carga masiva
+    BULK_MAX_LINE_BYTES: int = int(os.getenv('BULK_MAX_LINE_BYTES', 1024 * 1024))  # Fila más larga aceptada (o registro CSV multilínea)
+    PAGE_MAX_LIMIT: int = int(os.getenv('PAGE_MAX_LIMIT', 100))  # Tamaño máximo de página en los listados
+    PASSWORD_HASH_EXECUTOR: str = os.getenv('PASSWORD_HASH_EXECUTOR', 'thread')  # 'thread' o 'process'
+    PASSWORD_HASH_WORKERS: int = int(os.getenv('PASSWORD_HASH_WORKERS', 4))
+    PASSWORD_HASH_MAX_PENDING: int = int(os.getenv('PASSWORD_HASH_MAX_PENDING', 32))  # Tareas en cola + en ejecución
+    PASSWORD_HASH_WAIT_TIMEOUT: float = float(os.getenv('PASSWORD_HASH_WAIT_TIMEOUT', 5))
 
     @property
     def database_url(self):
         return f'postgresql://{self.DB_USERNAME}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}'
 
+    @property
+    def async_database_url(self):
+        return f'postgresql+asyncpg://{self.DB_USERNAME}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}'
+
 settings = Settings()
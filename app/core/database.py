@@ -1,11 +1,239 @@
+import asyncio
+import itertools
+import logging
+import math
+import time
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
 from sqlmodel import SQLModel, create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine
+from starlette.datastructures import MutableHeaders
 from app.core.config import settings
+from app.core.metrics import TimedPoolMixin, instrument_engine
+
+logger = logging.getLogger(__name__)
+
+
+# Pools que registran el tiempo de espera del checkout
+class TimedQueuePool(TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+# Configuración del pool de conexiones (ver Settings.DB_POOL_*)
+pool_options = dict(
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+)
+
+engine = create_engine(settings.database_url, poolclass=TimedQueuePool, **pool_options)
+instrument_engine(engine)
+
+# Motor asíncrono (asyncpg), solo se crea cuando DB_MODE=async
+async_engine = None
+if settings.DB_MODE == "async":
+    async_engine = create_async_engine(settings.async_database_url, poolclass=TimedAsyncAdaptedQueuePool, **pool_options)
+    instrument_engine(async_engine.sync_engine)
+
+
+class ReplicaSet:
+    """Réplicas de solo lectura con selección round-robin.
+
+    Una réplica que falla al conectar (o pierde la conexión) queda fuera durante
+    DB_REPLICA_EJECT_SECONDS; sin réplicas sanas las lecturas van al primario.
+    """
+
+    def __init__(self, engines: list):
+        self.engines = engines
+        self._ejected_until = [0.0] * len(engines)
+        self._counter = itertools.count()
+        self.ejections = 0
+        for index, replica in enumerate(engines):
+            sync_engine = getattr(replica, "sync_engine", replica)
+            instrument_engine(sync_engine)
+            event.listen(sync_engine, "handle_error", self._error_handler(index))
+
+    def _error_handler(self, index: int):
+        def handle_error(context):
+            # Solo errores de conexión: fallo al conectar (sin conexión todavía) o desconexión
+            if context.is_disconnect or context.connection is None:
+                self.eject(index)
+        return handle_error
+
+    def eject(self, index: int):
+        if self._ejected_until[index] < time.monotonic():
+            self.ejections += 1
+            logger.warning("Réplica %s fuera de servicio por %ss", index, settings.DB_REPLICA_EJECT_SECONDS)
+        self._ejected_until[index] = time.monotonic() + settings.DB_REPLICA_EJECT_SECONDS
+
+    def choose(self):
+        """Devuelve el engine de una réplica sana o None"""
+        now = time.monotonic()
+        healthy = [replica for replica, until in zip(self.engines, self._ejected_until) if until <= now]
+        if not healthy:
+            return None
+        return healthy[next(self._counter) % len(healthy)]
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "configured": len(self.engines),
+            "healthy": sum(1 for until in self._ejected_until if until <= now),
+            "ejections": self.ejections,
+        }
+
+
+replicas = ReplicaSet([create_engine(url, poolclass=TimedQueuePool, **pool_options) for url in settings.DB_REPLICA_URLS])
+
+# Réplicas para las sesiones asíncronas (las síncronas siguen sirviendo a get_current_user y demás)
+async_replicas = ReplicaSet([
+    create_async_engine(url.replace("postgresql://", "postgresql+asyncpg://", 1), poolclass=TimedAsyncAdaptedQueuePool, **pool_options)
+    for url in (settings.DB_REPLICA_URLS if settings.DB_MODE == "async" else [])
+])
+
+# Read-your-writes entre workers: tras un commit la respuesta lleva hasta cuándo (epoch) ese cliente
+# debe leer del primario, en una cookie y en un header que los clientes sin cookies reenvían tal cual
+READ_YOUR_WRITES_COOKIE = "glum_ryw"
+READ_YOUR_WRITES_HEADER = "x-read-your-writes"
+
+
+def _track_writes(session, request: Request):
+    if replicas.engines:
+        event.listen(session, "after_commit", lambda _session: _mark_write(request))
+
+
+def _mark_write(request: Request):
+    request.state.read_your_writes_until = time.time() + settings.DB_READ_YOUR_WRITES_SECONDS
+
+
+def _read_your_writes_until(request: Request) -> float:
+    until = getattr(request.state, "read_your_writes_until", None)
+    if until is not None:
+        return until
+    value = request.headers.get(READ_YOUR_WRITES_HEADER) or request.cookies.get(READ_YOUR_WRITES_COOKIE)
+    try:
+        until = float(value) if value else 0.0
+    except ValueError:
+        return 0.0
+    # El valor lo envía el cliente: uno no finito o más allá del plazo que el servidor habría fijado
+    # (con 1s de margen por el redondeo) no es un marcador nuestro y se ignora
+    if not math.isfinite(until) or until > time.time() + settings.DB_READ_YOUR_WRITES_SECONDS + 1:
+        return 0.0
+    return until
+
+
+def _read_engine(request: Request, primary, replica_set: ReplicaSet):
+    if _read_your_writes_until(request) > time.time():
+        return primary
+    return replica_set.choose() or primary
+
+
+class ReadYourWritesMiddleware:
+    """Middleware ASGI: si la petición confirmó escrituras, la respuesta lleva el marcador read-your-writes"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not replicas.engines:
+            return await self.app(scope, receive, send)
+        state = scope.setdefault("state", {})
+
+        async def send_wrapper(message):
+            until = state.get("read_your_writes_until")
+            if message["type"] == "http.response.start" and until is not None:
+                headers = MutableHeaders(scope=message)
+                headers.append(READ_YOUR_WRITES_HEADER, f"{until:.3f}")
+                headers.append("set-cookie", (
+                    f"{READ_YOUR_WRITES_COOKIE}={until:.3f}; Max-Age={math.ceil(settings.DB_READ_YOUR_WRITES_SECONDS)}; "
+                    "Path=/; HttpOnly; SameSite=Lax"
+                ))
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
 
-engine = create_engine(settings.database_url)
 
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
 
-def get_session():
+def get_session(request: Request):
     with Session(engine) as session:
-        yield session
\ No newline at end of file
+        _track_writes(session, request)
+        yield session
+
+async def get_async_session(request: Request):
+    async with AsyncSession(async_engine) as session:
+        _track_writes(session.sync_session, request)
+        yield session
+
+# Sesiones de escritura: expire_on_commit=False para serializar la respuesta con los valores
+# que devuelve el propio INSERT/UPDATE ... RETURNING, sin volver a consultar tras el commit
+def get_write_session(request: Request):
+    with Session(engine, expire_on_commit=False) as session:
+        _track_writes(session, request)
+        yield session
+
+async def get_async_write_session(request: Request):
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        _track_writes(session.sync_session, request)
+        yield session
+
+# Sesiones para dependencias de solo lectura (réplica si hay, primario si no).
+# Con réplica se conecta de inmediato: si falla, la réplica queda fuera y se usa el primario.
+def get_read_session(request: Request):
+    session = Session(_read_engine(request, engine, replicas))
+    if session.bind is not engine:
+        try:
+            session.connection()
+        except OperationalError:
+            session.close()
+            session = Session(engine)
+    with session:
+        yield session
+
+async def get_async_read_session(request: Request):
+    session = AsyncSession(_read_engine(request, async_engine, async_replicas))
+    if session.bind is not async_engine:
+        try:
+            await session.connection()
+        except OperationalError:
+            await session.close()
+            session = AsyncSession(async_engine)
+    async with session:
+        yield session
+
+
+def warm_up_pool(connections: int):
+    """Abre `connections` conexiones al arrancar para no pagar TCP/TLS/auth en las primeras peticiones"""
+    opened = [engine.connect() for _ in range(min(connections, settings.DB_POOL_SIZE))]
+    for connection in opened:
+        connection.close()
+
+
+async def warm_up_async_pool(connections: int):
+    opened = await asyncio.gather(*(async_engine.connect() for _ in range(min(connections, settings.DB_POOL_SIZE))))
+    for connection in opened:
+        await connection.close()
+
+
+def pool_stats() -> dict:
+    stats = {}
+    for prefix, pool in (("sync", engine.pool), ("async", async_engine.pool if async_engine else None)):
+        if pool is None:
+            continue
+        stats.update({
+            f"{prefix}_size": pool.size(),
+            f"{prefix}_checked_out": pool.checkedout(),
+            f"{prefix}_checked_in": pool.checkedin(),
+            f"{prefix}_overflow": pool.overflow(),
+        })
+    return stats
@@ -0,0 +1,21 @@
+from typing import Iterable, Optional
+
+from fastapi import HTTPException
+
+
+def project_columns(model, fields: Optional[str], allowed: Iterable[str], required: Iterable[str] = ("id",)) -> list:
+    """Convierte el parámetro `?fields=a,b` en la lista de columnas del modelo a seleccionar.
+
+    Solo se aceptan campos de `allowed`; los de `required` se incluyen siempre.
+    Sin `fields` se devuelven todas las columnas permitidas.
+    """
+    allowed = list(allowed)
+    if not fields:
+        names = allowed
+    else:
+        requested = [name.strip() for name in fields.split(",") if name.strip()]
+        invalid = [name for name in requested if name not in allowed]
+        if invalid:
+            raise HTTPException(status_code=400, detail=f"Campos no válidos: {', '.join(invalid)}")
+        names = [name for name in required if name not in requested] + requested
+    return [getattr(model, name) for name in dict.fromkeys(names)]
@@ -0,0 +1,76 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Optional
+
+from jose import JWTError, jwk, jwt
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class KeyRing:
+    """Claves de firma de los JWT, cargadas y parseadas una sola vez por worker.
+
+    Con JWT_KEYS_DIR y JWT_ACTIVE_KID los tokens se firman con la clave asimétrica activa y
+    llevan su `kid`; las demás claves del directorio solo verifican (rotación). Sin claves se
+    mantiene la firma HMAC con TOKEN_GLUM. El JWKS público se serializa al cargar.
+    """
+
+    def __init__(self, keys_dir: Optional[str], active_kid: Optional[str], algorithm: str):
+        self.algorithm = algorithm
+        self.signing_keys: dict = {}
+        self.verifying_keys: dict = {}
+        if keys_dir:
+            self._load(keys_dir)
+        self.active_kid = active_kid if active_kid in self.signing_keys else None
+        if active_kid and self.active_kid is None:
+            logger.error("JWT_ACTIVE_KID=%s no tiene clave privada en %s; se firma con HMAC", active_kid, keys_dir)
+        self.hmac_secret = settings.TOKEN_GLUM.encode("utf-8") if settings.TOKEN_GLUM else None
+        self.jwks_body, self.jwks_etag = self._build_jwks()
+
+    def _load(self, keys_dir: str):
+        for name in sorted(os.listdir(keys_dir)):
+            if not name.endswith(".pem"):
+                continue
+            public_only = name.endswith(".pub.pem")
+            kid = name[: -len(".pub.pem")] if public_only else name[: -len(".pem")]
+            with open(os.path.join(keys_dir, name), "rb") as f:
+                key = jwk.construct(f.read(), self.algorithm)
+            if public_only:
+                self.verifying_keys[kid] = key
+            else:
+                self.signing_keys[kid] = key
+                self.verifying_keys[kid] = key.public_key()
+
+    def _build_jwks(self) -> tuple[bytes, str]:
+        keys = [
+            {**key.to_dict(), "kid": kid, "use": "sig", "alg": self.algorithm}
+            for kid, key in self.verifying_keys.items()
+        ]
+        body = json.dumps({"keys": keys}, separators=(",", ":")).encode("utf-8")
+        return body, f'"{hashlib.sha1(body).hexdigest()}"'
+
+    def sign(self, claims: dict) -> str:
+        if self.active_kid:
+            return jwt.encode(claims, self.signing_keys[self.active_kid], self.algorithm, headers={"kid": self.active_kid})
+        return jwt.encode(claims, self.hmac_secret, settings.ALGORITM)
+
+    def decode(self, token: str, options: Optional[dict] = None) -> dict:
+        """Verifica la firma (según el `kid` de la cabecera) y devuelve los claims; JWTError si no es válido.
+        `options` se pasa a jwt.decode (p. ej. {"verify_exp": False})"""
+        header = jwt.get_unverified_header(token)
+        kid = header.get("kid")
+        if kid is not None:
+            key = self.verifying_keys.get(kid)
+            if key is None:
+                raise JWTError("kid desconocido")
+            return jwt.decode(token, key, algorithms=[self.algorithm], options=options)
+        if not settings.JWT_ACCEPT_HMAC or self.hmac_secret is None:
+            raise JWTError("Token sin kid")
+        return jwt.decode(token, self.hmac_secret, algorithms=[settings.ALGORITM], options=options)
+
+
+key_ring = KeyRing(settings.JWT_KEYS_DIR, settings.JWT_ACTIVE_KID, settings.JWT_ASYMMETRIC_ALG)
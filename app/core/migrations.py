@@ -0,0 +1,52 @@
+import logging
+import os
+from typing import Optional
+from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError
+
+logger = logging.getLogger(__name__)
+
+# Raíz del repositorio (donde está alembic.ini)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+VERSION_TABLE = "glum.alembic_version"
+
+
+def alembic_config():
+    from alembic.config import Config
+
+    config = Config(os.path.join(BASE_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BASE_DIR, "migrations"))
+    return config
+
+
+def head_revision() -> Optional[str]:
+    """Última revisión disponible en migrations/versions (solo lee ficheros, no la BD)."""
+    from alembic.script import ScriptDirectory
+
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+
+def current_revision(engine) -> Optional[str]:
+    """Revisión aplicada en la BD; None si nunca se ha migrado."""
+    with engine.connect() as conn:
+        try:
+            return conn.execute(text(f"SELECT version_num FROM {VERSION_TABLE}")).scalar()
+        except ProgrammingError:
+            return None
+
+
+def check_schema_version(engine, mode: str):
+    """Comprobación barata al arrancar: una consulta a alembic_version, sin reflejar tablas.
+
+    En modo 'strict' un esquema desactualizado impide arrancar; en 'warn' solo se registra.
+    """
+    if mode == "off":
+        return
+    head = head_revision()
+    current = current_revision(engine)
+    if current == head:
+        return
+    message = f"Esquema de BD en la revisión {current}, se esperaba {head}. Ejecutar: python -m app.manage migrate"
+    if mode == "strict":
+        raise RuntimeError(message)
+    logger.warning(message)
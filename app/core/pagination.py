@@ -0,0 +1,18 @@
+import base64
+import json
+
+from fastapi import HTTPException
+
+
+def encode_cursor(last_id: int) -> str:
+    """Cursor opaco con el último id entregado (paginación por keyset)"""
+    raw = json.dumps({"id": last_id}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        return int(json.loads(raw)["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
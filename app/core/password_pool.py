@@ -0,0 +1,101 @@
+import asyncio
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+
+
+class PasswordHashPool:
+    """Executor acotado para el hashing de contraseñas (bcrypt), fuera del event loop.
+
+    El número de tareas pendientes está limitado: cuando se alcanza el máximo las
+    peticiones síncronas esperan hasta `wait_timeout` y las asíncronas se rechazan
+    de inmediato con 503, para que una avalancha de logins no bloquee al resto del API.
+    """
+
+    def __init__(self, kind: str, max_workers: int, max_pending: int, wait_timeout: float):
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.wait_timeout = wait_timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._executor = None
+        self.pending = 0
+        self.max_pending_seen = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.kind == "process":
+                        self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                    else:
+                        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="password-hash")
+        return self._executor
+
+    def _release(self, _future: Future):
+        with self._lock:
+            self.pending -= 1
+            self.completed += 1
+        self._slots.release()
+
+    def submit(self, fn: Callable, *args, blocking: bool = True) -> Future:
+        acquired = self._slots.acquire(timeout=self.wait_timeout) if blocking else self._slots.acquire(blocking=False)
+        if not acquired:
+            with self._lock:
+                self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Servicio de autenticación saturado, intenta de nuevo",
+                headers={"Retry-After": "1"},
+            )
+        with self._lock:
+            self.pending += 1
+            self.max_pending_seen = max(self.max_pending_seen, self.pending)
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            with self._lock:
+                self.pending -= 1
+            self._slots.release()
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def run(self, fn: Callable, *args):
+        """Ejecuta `fn` en el pool y espera el resultado (para código síncrono)"""
+        return self.submit(fn, *args).result()
+
+    async def run_async(self, fn: Callable, *args):
+        """Ejecuta `fn` en el pool sin bloquear el event loop"""
+        return await asyncio.wrap_future(self.submit(fn, *args, blocking=False))
+
+    def stats(self) -> dict:
+        return {
+            "kind": self.kind,
+            "workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "max_pending_seen": self.max_pending_seen,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_pool = PasswordHashPool(
+    kind=settings.PASSWORD_HASH_EXECUTOR,
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    wait_timeout=settings.PASSWORD_HASH_WAIT_TIMEOUT,
+)
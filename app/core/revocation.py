@@ -0,0 +1,260 @@
+import calendar
+import hashlib
+import logging
+import math
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.core.database import engine
+from app.models.model_revoked_token import RevokedToken
+
+logger = logging.getLogger(__name__)
+
+# Filas ya vistas que se vuelven a leer en cada sincronización: los id de la secuencia pueden
+# confirmarse fuera de orden y una fila con id menor aparecer después que otra mayor
+SYNC_OVERLAP = 1000
+
+# Vida máxima de un token: hasta entonces hay que recordar una revocación. La de un usuario
+# (cambio de contraseña) invalida también sus refresh tokens, que viven REFRESH_TOKEN_EXPIRE_DAYS;
+# con la vida del access token se olvidaría antes de tiempo y un refresh anterior volvería a valer.
+TOKEN_MAX_LIFETIME = max(int(settings.TIME_EXP_WSGLUM) * 60, settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400)
+
+
+class SubjectRevocations:
+    """Usuarios cuyos tokens emitidos antes de cierto instante ya no son válidos.
+
+    Se consulta en memoria en cada petición. Una entrada solo hace falta mientras pueda
+    quedar vivo un token anterior (TOKEN_MAX_LIFETIME), así que se descarta pasado ese tiempo.
+    Cada worker tiene su propia copia: el que registra la revocación la aplica al confirmar y
+    los demás al sincronizar con glum.revoked_tokens (hasta REVOCATION_SYNC_SECONDS después).
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._revoked: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def revoke(self, username: str, at: float = None):
+        at = time.time() if at is None else at
+        with self._lock:
+            self._revoked[username] = max(at, self._revoked.get(username, 0))
+            self._prune(time.time())
+
+    def is_revoked(self, username: str, issued_at: float) -> bool:
+        revoked_at = self._revoked.get(username)
+        # iat tiene resolución de segundos: un token del mismo segundo que la revocación se acepta
+        return revoked_at is not None and issued_at < int(revoked_at)
+
+    def _prune(self, now: float):
+        expired = [username for username, at in self._revoked.items() if at + self.ttl < now]
+        for username in expired:
+            del self._revoked[username]
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+
+class HashSetFilter:
+    """Conjunto exacto de jti revocados"""
+
+    exact = True
+
+    def __init__(self):
+        self._items: set[bytes] = set()
+
+    def add(self, jti: str):
+        self._items.add(bytes.fromhex(jti) if len(jti) == 32 else jti.encode("utf-8"))
+
+    def __contains__(self, jti: str) -> bool:
+        return (bytes.fromhex(jti) if len(jti) == 32 else jti.encode("utf-8")) in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def memory_bytes(self) -> int:
+        sample = next(iter(self._items), b"")
+        return sys.getsizeof(self._items) + len(self._items) * sys.getsizeof(sample)
+
+    def false_positive_rate(self) -> float:
+        return 0.0
+
+
+class BloomFilter:
+    """Filtro de Bloom sobre un bytearray: memoria fija, sin falsos negativos"""
+
+    exact = False
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self._count = 0
+
+    def _positions(self, jti: str):
+        digest = hashlib.blake2b(jti.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, jti: str):
+        if jti in self:
+            return
+        for position in self._positions(jti):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self._count += 1
+
+    def __contains__(self, jti: str) -> bool:
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(jti))
+
+    def __len__(self) -> int:
+        return self._count
+
+    def memory_bytes(self) -> int:
+        return sys.getsizeof(self._bits)
+
+    def false_positive_rate(self) -> float:
+        """Tasa estimada con los elementos insertados"""
+        return (1 - math.exp(-self.hashes * self._count / self.size)) ** self.hashes
+
+
+def _build_filter():
+    if settings.REVOCATION_FILTER == "bloom":
+        return BloomFilter(settings.REVOCATION_BLOOM_CAPACITY, settings.REVOCATION_BLOOM_ERROR_RATE)
+    return HashSetFilter()
+
+
+def _timestamp(value: datetime) -> float:
+    return calendar.timegm(value.utctimetuple())
+
+
+class RevocationStore:
+    """Réplica en memoria de glum.revoked_tokens, refrescada de forma incremental por id.
+
+    La consulta por petición (`is_token_revoked`) no hace E/S con el filtro exacto; con el
+    filtro de Bloom solo un acierto (token revocado o falso positivo) se confirma en la BD.
+    """
+
+    def __init__(self):
+        self.subjects = SubjectRevocations(ttl=TOKEN_MAX_LIFETIME)
+        self.tokens = _build_filter()
+        self.last_id = 0
+        self.syncs = 0
+        self.last_sync_seconds = 0.0
+        self.confirmations = 0
+        self._built_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _apply(self, row, tokens):
+        if row.jti:
+            tokens.add(row.jti)
+        elif row.username:
+            self.subjects.revoke(row.username, _timestamp(row.revoked_at))
+
+    def sync_once(self, rebuild: bool = False):
+        """Trae las revocaciones con id posterior al último visto (todas las vigentes si `rebuild`)"""
+        started = time.monotonic()
+        last_id = 0 if rebuild else max(0, self.last_id - SYNC_OVERLAP)
+        tokens = _build_filter() if rebuild else self.tokens
+        with Session(engine) as session:
+            while True:
+                rows = session.exec(
+                    select(RevokedToken.id, RevokedToken.jti, RevokedToken.username, RevokedToken.revoked_at)
+                    .where(RevokedToken.id > last_id, RevokedToken.expires_at > datetime.utcnow())
+                    .order_by(RevokedToken.id)
+                    .limit(10000)
+                ).all()
+                for row in rows:
+                    self._apply(row, tokens)
+                if rows:
+                    last_id = rows[-1].id
+                if len(rows) < 10000:
+                    break
+        with self._lock:
+            if rebuild:
+                self.tokens = tokens
+                self._built_at = time.monotonic()
+            self.last_id = max(self.last_id, last_id)
+        self.syncs += 1
+        self.last_sync_seconds = time.monotonic() - started
+
+    def is_token_revoked(self, jti: Optional[str]) -> bool:
+        if not jti or jti not in self.tokens:
+            return False
+        if self.tokens.exact:
+            return True
+        self.confirmations += 1
+        with Session(engine) as session:
+            return session.exec(select(RevokedToken.id).where(RevokedToken.jti == jti)).first() is not None
+
+    def is_revoked(self, payload: dict) -> bool:
+        return self.subjects.is_revoked(payload.get("sub"), payload.get("iat", 0)) or self.is_token_revoked(payload.get("jti"))
+
+    # Sentencias para registrar la revocación dentro de la transacción de quien la pide;
+    # tras el commit se aplica en este worker con `remember` (los demás la ven en la siguiente sincronización)
+    @staticmethod
+    def revoke_token_statement(jti: str, username: str, expires_at: float):
+        # Revocar dos veces el mismo token no es un error
+        return (
+            pg_insert(RevokedToken)
+            .values(jti=jti, username=username, revoked_at=datetime.utcnow(), expires_at=datetime.utcfromtimestamp(expires_at))
+            .on_conflict_do_nothing(index_elements=[RevokedToken.jti])
+        )
+
+    @staticmethod
+    def revoke_subject_statement(username: str):
+        return insert(RevokedToken).values(username=username, revoked_at=datetime.utcnow(), expires_at=datetime.utcfromtimestamp(time.time() + TOKEN_MAX_LIFETIME))
+
+    def remember_token(self, jti: str):
+        self.tokens.add(jti)
+
+    def remember_subject(self, username: str):
+        self.subjects.revoke(username)
+
+    def _run(self):
+        while not self._stop.wait(settings.REVOCATION_SYNC_SECONDS):
+            try:
+                rebuild = time.monotonic() - self._built_at > settings.REVOCATION_REBUILD_SECONDS
+                self.sync_once(rebuild=rebuild)
+            except Exception:
+                logger.exception("Error al sincronizar las revocaciones de tokens")
+
+    def start(self):
+        if self._thread is None:
+            try:
+                self.sync_once(rebuild=True)
+            except Exception:
+                logger.exception("No se pudieron cargar las revocaciones de tokens")
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="token-revocations", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def stats(self) -> dict:
+        return {
+            "tokens": len(self.tokens),
+            "subjects": len(self.subjects),
+            "memory_bytes": self.tokens.memory_bytes(),
+            "false_positive_rate": self.tokens.false_positive_rate(),
+            "confirmations": self.confirmations,
+            "syncs": self.syncs,
+            "last_sync_seconds": self.last_sync_seconds,
+        }
+
+
+revocation_store = RevocationStore()
@@ -1,48 +1,57 @@
-from datetime import datetime, timedelta
+from dataclasses import dataclass
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
-from sqlmodel import Session
+from jose import ExpiredSignatureError, JWTError
 
-from app.core.config import settings
-from app.core.auth import create_access_token
-from app.dependencies.database import get_session
-from app.models.model_user import User
-from app.core.config import settings
+from app.core.keys import key_ring
+from app.core.revocation import revocation_store
 
 
-# Clave secreta (mejor cargar desde variables de entorno)
-SECRET_KEY = settings.TOKEN_GLUM
-ALGORITHM = settings.ALGORITM
-
 # Crear una instancia de OAuth2PasswordBearer para extraer el token del encabezado 'Authorization'
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
-# Función para obtener el usuario actual desde el token JWT
-def get_current_user(db: Session = Depends(get_session), token: str = Depends(oauth2_scheme)):
+# Usuario autenticado según los claims del access token
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    username: str
+    role: str
+    status: int
+
+
+# Función para obtener el usuario actual desde el token JWT.
+# Los access tokens llevan rol y estado y caducan pronto: se confía en ellos sin consultar la BD.
+def get_current_user(token: str = Depends(oauth2_scheme)):
     
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise HTTPException(status_code=401, detail="No sub found in token")
-
-        # Buscar el usuario en la base de datos
-        db_user = db.query(User).filter(User.username == username).first()
-        if db_user is None:
-            raise HTTPException(status_code=401, detail="User not found")
-        
-        return db_user
+        payload = key_ring.decode(token)
+    except ExpiredSignatureError:
+        raise HTTPException(status_code=401, detail="Token expirado")
     except JWTError:
         raise HTTPException(status_code=403, detail="Could not validate credentials")
 
-APP_TOKEN_SECRET_KEY = settings.TOKEN_GLUM
-APP_TOKEN_ALGORITHM = settings.ALGORITM
+    username: str = payload.get("sub")
+    if username is None:
+        raise HTTPException(status_code=401, detail="No sub found in token")
+
+    token_type = payload.get("typ")
+    if token_type == "refresh":
+        raise HTTPException(status_code=401, detail="El refresh token solo sirve en /auth/refresh")
+    # Los tokens sin tipo o sin caducidad (emitidos antes de los access tokens de vida corta) no
+    # se aceptan: no caducarían nunca y no se podrían revocar
+    if token_type != "access" or payload.get("exp") is None:
+        raise HTTPException(status_code=401, detail="Token sin tipo o sin caducidad, inicie sesión de nuevo")
+
+    if revocation_store.is_revoked(payload):
+        raise HTTPException(status_code=401, detail="Token revocado")
+    if payload.get("status") != 1:
+        raise HTTPException(status_code=403, detail="Usuario Inactivo o bloqueado")
+    return Principal(id=payload["uid"], username=username, role=payload["role"], status=payload["status"])
 
 def validate_token_payload(token: str):
     try:
 
-        payload = jwt.decode(token, APP_TOKEN_SECRET_KEY, algorithms=[APP_TOKEN_ALGORITHM])
+        payload = key_ring.decode(token)
         client_id: str = payload.get("sub")
         if client_id is None:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token de aplicación inválido: no se encontró 'sub'.")
@@ -0,0 +1,35 @@
+from typing import Optional
+
+from fastapi import HTTPException
+
+
+def version_conflict() -> HTTPException:
+    return HTTPException(status_code=409, detail="El registro fue modificado por otra petición")
+
+
+def version_etag(resource_id: int, version: int) -> str:
+    """ETag de un registro con columna `version` (control de concurrencia optimista)"""
+    return f'"{resource_id}-{version}"'
+
+
+def row_with_etag(row) -> tuple[dict, str]:
+    """Separa la columna `version` de una fila proyectada: devuelve (campos, ETag)"""
+    item = row._asdict()
+    return item, version_etag(item["id"], item.pop("version"))
+
+
+def expected_version(if_match: Optional[str], resource_id: int) -> Optional[int]:
+    """Versión que exige la cabecera If-Match; None si no se envía (o es '*').
+
+    Un ETag que no corresponde al registro no puede coincidir: se responde 409.
+    """
+    if not if_match or if_match.strip() == "*":
+        return None
+    tag = if_match.split(",")[0].strip()
+    try:
+        tagged_id, version = tag.strip('"').split("-")
+        if int(tagged_id) == resource_id:
+            return int(version)
+    except ValueError:
+        pass
+    raise version_conflict()
@@ -1 +1 @@
-from .database import session_dep
+from .database import session_dep, async_session_dep, read_session_dep, async_read_session_dep, write_session_dep, async_write_session_dep
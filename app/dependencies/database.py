@@ -1,6 +1,12 @@
 from typing import Annotated
 from fastapi import Depends
 from sqlmodel import Session
-from app.core.database import get_session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.database import get_session, get_async_session, get_read_session, get_async_read_session, get_write_session, get_async_write_session
 
 session_dep = Annotated[Session, Depends(get_session)]
+async_session_dep = Annotated[AsyncSession, Depends(get_async_session)]
+read_session_dep = Annotated[Session, Depends(get_read_session)]
+async_read_session_dep = Annotated[AsyncSession, Depends(get_async_read_session)]
+write_session_dep = Annotated[Session, Depends(get_write_session)]
+async_write_session_dep = Annotated[AsyncSession, Depends(get_async_write_session)]
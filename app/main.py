@@ -1,16 +1,84 @@
-from fastapi import FastAPI, Depends
-from app.core.database import create_db_and_tables
-from app.api.v1.endpoints import ep_products, ep_users, login
+from fastapi import FastAPI, Depends, Header, Response
+from fastapi.responses import ORJSONResponse, PlainTextResponse
+from typing import Optional
+from app.core.config import settings
+from app.core.database import engine, create_db_and_tables, warm_up_pool, warm_up_async_pool, async_engine, pool_stats, replicas, async_replicas, ReadYourWritesMiddleware
+from app.core.migrations import check_schema_version
+from app.core.keys import key_ring
+from app.core.metrics import MetricsMiddleware, registry
+from app.core.password_pool import password_pool
+from app.core.revocation import revocation_store
+from app.services.service_email import outbox_dispatcher
+from app.services.service_product import catalog_cache
+from app.services.service_wallet import wallet_reconciler
+from app.api.v1.endpoints import ep_products, ep_users, ep_wallet, login
 from fastapi.security import OAuth2PasswordBearer
+from starlette.concurrency import run_in_threadpool
 
-app = FastAPI()
+# orjson como codificador por defecto de las respuestas JSON
+app = FastAPI(default_response_class=ORJSONResponse)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(ReadYourWritesMiddleware)
+
+# Métricas de los componentes internos, evaluadas en cada scrape
+registry.register_collector("db_pool", pool_stats)
+registry.register_collector("db_replicas", replicas.stats)
+registry.register_collector("db_async_replicas", async_replicas.stats)
+registry.register_collector("password_hash_pool", password_pool.stats)
+registry.register_collector("catalog_cache", catalog_cache.stats)
+registry.register_collector("email_outbox", outbox_dispatcher.stats)
+registry.register_collector("wallet_reconcile", wallet_reconciler.stats)
+registry.register_collector("token_revocation", revocation_store.stats)
 
 @app.on_event("startup")
 def on_startup():
-    create_db_and_tables()
+    # El esquema lo gestionan las migraciones (python -m app.manage migrate); create_all solo en desarrollo
+    if settings.DB_AUTO_CREATE:
+        create_db_and_tables()
+    else:
+        check_schema_version(engine, settings.DB_SCHEMA_CHECK)
+    if settings.OUTBOX_ENABLED:
+        outbox_dispatcher.start()
+    wallet_reconciler.start()
+    revocation_store.start()
+
+@app.on_event("startup")
+async def warm_up_connections():
+    if settings.DB_POOL_WARMUP:
+        await run_in_threadpool(warm_up_pool, settings.DB_POOL_WARMUP)
+        if async_engine is not None:
+            await warm_up_async_pool(settings.DB_POOL_WARMUP)
+
+@app.on_event("shutdown")
+def on_shutdown():
+    outbox_dispatcher.stop()
+    wallet_reconciler.stop()
+    revocation_store.stop()
+    password_pool.shutdown()
+
+# Exposición de métricas en formato Prometheus
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+# Claves públicas para que otros servicios verifiquen los tokens sin llamar a esta API
+# (el cuerpo se serializa al cargar las claves; aquí solo se entrega)
+@app.get("/.well-known/jwks.json", include_in_schema=False)
+def jwks(if_none_match: Optional[str] = Header(None)):
+    headers = {"ETag": key_ring.jwks_etag, "Cache-Control": f"public, max-age={settings.JWKS_MAX_AGE}"}
+    if if_none_match == key_ring.jwks_etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=key_ring.jwks_body, media_type="application/json", headers=headers)
 
-# Incluir los routers de los endpoints
-app.include_router(ep_users.router, prefix="/users", tags=["users"])
-app.include_router(ep_products.router, prefix="/products", tags=["products"])
+# Incluir los routers de los endpoints (DB_MODE=async usa las variantes con AsyncSession;
+# las rutas sin variante asíncrona, el monedero y /auth siguen en el motor síncrono, ver Settings.DB_MODE)
+if settings.DB_MODE == "async":
+    from app.api.v1.endpoints import ep_users_async, ep_products_async
+    app.include_router(ep_users_async.router, prefix="/users", tags=["users"])
+    app.include_router(ep_products_async.router, prefix="/products", tags=["products"])
+else:
+    app.include_router(ep_users.router, prefix="/users", tags=["users"])
+    app.include_router(ep_products.router, prefix="/products", tags=["products"])
+app.include_router(ep_wallet.router, prefix="/users", tags=["wallet"])
 #app.include_router(login.router, prefix="/auth", tags=["auth"])
 app.include_router(login.router, tags=["auth"])
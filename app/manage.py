@@ -0,0 +1,121 @@
+"""Comandos de administración de la BD.
+
+    python -m app.manage migrate [revision]   Aplica las migraciones (por defecto hasta head)
+    python -m app.manage downgrade <revision> Revierte hasta la revisión indicada
+    python -m app.manage current              Muestra la revisión aplicada y la esperada
+    python -m app.manage stamp <revision>     Marca la revisión sin ejecutarla (BD creada con create_all)
+    python -m app.manage revision <mensaje>   Genera una migración comparando los modelos con la BD
+    python -m app.manage check-plans          Verifica que las consultas frecuentes usan índices
+    python -m app.manage reconcile-wallets [--fix]  Compara saldos de puntos con el ledger (y los corrige)
+    python -m app.manage purge-revocations          Borra las revocaciones de tokens ya caducados
+"""
+import sys
+from datetime import datetime
+from alembic import command
+from sqlalchemy import delete, text
+from sqlmodel import Session, select
+from app.core.database import engine
+from app.core.migrations import alembic_config, current_revision, head_revision
+from app.models.model_revoked_token import RevokedToken
+from app.models.model_user import User
+from app.services.service_product import summary_statement, summary_version_statement
+from app.services.service_wallet import reconcile
+
+
+def migrate(revision: str = "head"):
+    command.upgrade(alembic_config(), revision)
+
+
+def downgrade(revision: str):
+    command.downgrade(alembic_config(), revision)
+
+
+def current():
+    print(f"BD: {current_revision(engine)}  head: {head_revision()}")
+
+
+def stamp(revision: str):
+    command.stamp(alembic_config(), revision)
+
+
+def revision(*message: str):
+    # Las revisiones se numeran de forma correlativa (0001, 0002, ...)
+    head = head_revision()
+    rev_id = f"{int(head) + 1:04d}" if head else "0001"
+    command.revision(alembic_config(), message=" ".join(message), autogenerate=True, rev_id=rev_id)
+
+
+# Consultas de las rutas calientes (autenticación, usuarios y resumen del catálogo)
+HOT_QUERIES = {
+    "usuario por username": lambda: select(User).where(User.username == "plan@check"),
+    "usuario por email": lambda: select(User).where(User.email == "plan@check"),
+    "usuario por teléfono": lambda: select(User).where(User.phone_number == "0000000000"),
+    "resumen del catálogo": lambda: summary_statement(1),
+    "versión del resumen": lambda: summary_version_statement(1),
+}
+
+
+def explain_hot_queries(conn) -> dict:
+    """Plan (EXPLAIN) de cada consulta de HOT_QUERIES en la conexión dada"""
+    plans = {}
+    for name, build in HOT_QUERIES.items():
+        sql = str(build().compile(engine, compile_kwargs={"literal_binds": True}))
+        plans[name] = "\n".join(row[0] for row in conn.execute(text(f"EXPLAIN {sql}")))
+    return plans
+
+
+def check_plans():
+    """EXPLAIN de cada consulta con enable_seqscan=off: si aun así aparece un Seq Scan es que falta el índice.
+
+    No depende del volumen de datos (con tablas pequeñas Postgres prefiere el recorrido secuencial).
+    """
+    failed = []
+    with engine.connect() as conn:
+        conn.execute(text("SET enable_seqscan = off"))
+        for name, plan in explain_hot_queries(conn).items():
+            ok = "Seq Scan" not in plan
+            print(f"{'OK ' if ok else 'ERR'} {name}")
+            if not ok:
+                print(plan)
+                failed.append(name)
+    if failed:
+        sys.exit(1)
+
+
+def reconcile_wallets(*options: str):
+    with Session(engine) as session:
+        mismatches = reconcile(session, fix="--fix" in options)
+    for item in mismatches:
+        print(f"usuario {item['user_id']}: saldo {item['balance']}, ledger {item['ledger_total']}")
+    print(f"{len(mismatches)} saldos descuadrados" + (" (corregidos)" if mismatches and "--fix" in options else ""))
+
+
+def purge_revocations():
+    with Session(engine) as session:
+        deleted = session.execute(delete(RevokedToken).where(RevokedToken.expires_at <= datetime.utcnow())).rowcount
+        session.commit()
+    print(f"{deleted} revocaciones caducadas borradas")
+
+
+COMMANDS = {
+    "migrate": migrate,
+    "downgrade": downgrade,
+    "current": current,
+    "stamp": stamp,
+    "revision": revision,
+    "check-plans": check_plans,
+    "reconcile-wallets": reconcile_wallets,
+    "purge-revocations": purge_revocations,
+}
+
+
+def main(argv):
+    if not argv or argv[0] not in COMMANDS:
+        print(__doc__)
+        return 1
+    COMMANDS[argv[0]](*argv[1:])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
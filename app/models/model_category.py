@@ -1,9 +1,13 @@
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Index
 from datetime import datetime
 from typing import List, Optional
 
 class Categories(SQLModel, table=True):
-    __table_args__ = {"schema": "glum"}
+    __table_args__ = (
+        Index("ix_categories_company_id_status", "company_id", "status"),
+        {"schema": "glum"},
+    )
     id: int = Field(default=None, primary_key=True)
     company_id: int = Field(...)
     category_name: str = Field(..., min_length=5, max_length=100)
@@ -0,0 +1,30 @@
+from sqlmodel import SQLModel, Field
+from sqlalchemy import Index
+from datetime import datetime
+from typing import Optional
+
+
+class OutboxStatus:
+    PENDING = 0
+    SENT = 1
+    FAILED = 2
+    SENDING = 3  # Reservado por un despachador hasta next_attempt_at (lease)
+
+
+# Correos pendientes de envío; se escriben en la misma transacción que el cambio que los origina
+class EmailOutbox(SQLModel, table=True):
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+        {"schema": "glum"},
+    )
+    id: int = Field(default=None, primary_key=True)
+    recipient: str = Field(..., max_length=320)
+    subject: str = Field(..., max_length=250)
+    body: str = Field(...)
+    status: int = Field(default=OutboxStatus.PENDING, ge=0, le=9)
+    attempts: int = Field(default=0)
+    next_attempt_at: datetime = Field(default_factory=datetime.utcnow)
+    last_error: Optional[str] = Field(default=None, max_length=500)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    sent_at: Optional[datetime] = Field(default=None)
@@ -1,7 +1,14 @@
 from sqlmodel import Field, SQLModel, Relationship
-from typing import Optional
+from sqlalchemy import Index, text
+from sqlalchemy.orm import declared_attr
+from typing import List, Optional
 from datetime import datetime
 
+# Marca de tiempo UTC tomada por la BD al ejecutar la sentencia (no por el reloj de cada worker):
+# la sincronización incremental compara estas fechas con el watermark
+DB_UTC_NOW = "timezone('utc', clock_timestamp())"
+
+
 class ProductBase(SQLModel):
     company_id: int
     category_id: int
@@ -15,7 +22,11 @@ class ProductBase(SQLModel):
     status: int = 0
     
 class Products(SQLModel, table=True):
-    __table_args__ = {"schema": "glum"}
+    __table_args__ = (
+        Index("ix_products_company_id_updated_at", "company_id", "updated_at"),  # Sincronización incremental
+        Index("ix_products_company_id_category_id", "company_id", "category_id"),  # Resumen del catálogo
+        {"schema": "glum"},
+    )
     id: int = Field(default=None, primary_key=True)
     company_id: int = Field(..., min_length=1, max_length=10000)
     category_id: int = Field(foreign_key="glum.categories.id")
@@ -28,11 +39,43 @@ class Products(SQLModel, table=True):
     image_url: str = Field(...,  min_length=5, max_length=512)
     status: int = Field(default=0, ge=0, le=9)
     currency_id: int = Field(default=1, ge=1, le=9)
-    created_at: datetime = Field(default_factory=datetime.utcnow)  # Fecha de creación
-    updated_at: datetime = Field(default_factory=datetime.utcnow)  # Fecha de actualización
+    created_at: datetime = Field(default=None, sa_column_kwargs={"server_default": text(DB_UTC_NOW), "nullable": False})  # Fecha de creación
+    updated_at: datetime = Field(default=None, sa_column_kwargs={"server_default": text(DB_UTC_NOW), "nullable": False})  # Fecha de actualización
+    version: int = Field(default=1, sa_column_kwargs={"server_default": text("1")})  # Concurrencia optimista (If-Match)
 
     category: Optional["Categories"] = Relationship(back_populates="products")
 
+    @declared_attr
+    def __mapper_args__(cls):
+        return {"version_id_col": cls.__table__.c.version}
+
+# Registro de productos borrados, para informar las bajas en la sincronización incremental
+class ProductTombstones(SQLModel, table=True):
+    __tablename__ = "product_tombstones"
+    __table_args__ = (
+        Index("ix_product_tombstones_company_id_deleted_at", "company_id", "deleted_at"),
+        {"schema": "glum"},
+    )
+    id: int = Field(default=None, primary_key=True)
+    product_id: int = Field(...)
+    company_id: int = Field(...)
+    deleted_at: datetime = Field(default=None, sa_column_kwargs={"server_default": text(DB_UTC_NOW), "nullable": False})
+
+# Canjes de productos por puntos (solo inserción)
+class ProductRedemptions(SQLModel, table=True):
+    __tablename__ = "product_redemptions"
+    __table_args__ = (
+        Index("ix_product_redemptions_user_id_created_at", "user_id", "created_at"),
+        {"schema": "glum"},
+    )
+    id: int = Field(default=None, primary_key=True)
+    product_id: int = Field(..., index=True)
+    user_id: int = Field(...)
+    company_id: int = Field(...)
+    quantity: int = Field(..., ge=1)
+    points: int = Field(...)  # points_value * quantity al momento del canje
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
 class ProductSummary(SQLModel):
     id: int
     product_name: str
@@ -49,6 +92,23 @@ class ProductRead(ProductBase):
     created_at: datetime
     updated_at: datetime
 
+class ProductChanges(SQLModel):
+    upserted: List[int]  # Productos creados o modificados
+    deleted: List[int]  # Productos borrados
+    watermark: datetime  # Valor a enviar como 'since' en la siguiente consulta
+
+class ProductRedeem(SQLModel):
+    quantity: int = Field(default=1, ge=1, le=9999)
+
+class ProductRedemptionRead(SQLModel):
+    id: int
+    product_id: int
+    quantity: int
+    points: int
+    stock_quantity: int  # Existencias que quedan tras el canje
+    points_balance: int  # Saldo de puntos del usuario tras el canje
+    created_at: datetime
+
 class ProductUpdate(SQLModel):
     product_code: Optional[str] = None
     product_name: Optional[str] = None
@@ -0,0 +1,19 @@
+from sqlmodel import SQLModel, Field
+from sqlalchemy import BigInteger, Column, Index
+from datetime import datetime
+from typing import Optional
+
+
+# Revocaciones de tokens (fuente de verdad); cada worker las replica en memoria.
+# Con `jti` se revoca un token concreto (logout); sin él, todos los del usuario emitidos antes de `revoked_at`.
+class RevokedToken(SQLModel, table=True):
+    __tablename__ = "revoked_tokens"
+    __table_args__ = (
+        Index("ix_revoked_tokens_expires_at", "expires_at"),
+        {"schema": "glum"},
+    )
+    id: int = Field(default=None, sa_column=Column(BigInteger, primary_key=True, autoincrement=True))  # Cursor de la sincronización incremental
+    jti: Optional[str] = Field(default=None, max_length=64, unique=True, index=True)
+    username: Optional[str] = Field(default=None, max_length=100)
+    revoked_at: datetime = Field(default_factory=datetime.utcnow)
+    expires_at: datetime = Field(...)  # A partir de aquí el token ya caducó y la fila se puede borrar
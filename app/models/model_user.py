@@ -2,7 +2,9 @@ from sqlmodel import SQLModel, Field
 from datetime import datetime
 from typing import Optional
 from pydantic import EmailStr, BaseModel
-from app.core.auth import hash_password
+from sqlalchemy import text
+from sqlalchemy.orm import declared_attr
+from app.core.auth import hash_password, verify_password
 from enum import Enum
 from passlib.context import CryptContext
 
@@ -16,9 +18,9 @@ class UserRole(str, Enum):
 
 
 class UserBase(SQLModel):
-    username: str = Field(..., min_length=2, max_length=100) # Es el mismo mail
-    email: EmailStr = Field(..., index=True)  # Valida formato de email, ademas es obligatorio
-    phone_number: str = Field(..., min_length=10, max_length=20)  # Número de teléfono obligatorio
+    username: str = Field(..., min_length=2, max_length=100, unique=True, index=True) # Es el mismo mail
+    email: EmailStr = Field(..., unique=True, index=True)  # Valida formato de email, ademas es obligatorio
+    phone_number: str = Field(..., min_length=10, max_length=20, unique=True, index=True)  # Número de teléfono obligatorio
     first_name: str = Field(..., min_length=2, max_length=100)
     last_name: str = Field(..., min_length=2, max_length=100)
     login_attempts: int = Field(default=0, ge=0, le=9)
@@ -34,10 +36,15 @@ class User(UserBase, table=True):
     user_type: Optional[int] = Field(default=8, ge=0, le=9)
     status: Optional[int] = Field(default=1,ge=0, le=9)
     must_change_password: Optional[bool] = Field(default=False)
+    version: int = Field(default=1, sa_column_kwargs={"server_default": text("1")})  # Concurrencia optimista (If-Match)
+
+    @declared_attr
+    def __mapper_args__(cls):
+        return {"version_id_col": cls.__table__.c.version}
 
     # Método para verificar la contraseña ingresada
     def verify_password(self, password: str) -> bool:
-        return pwd_context.verify(password, self.password_hash)
+        return verify_password(password, self.password_hash)
 
 
 class LoginRequest(SQLModel):
@@ -0,0 +1,64 @@
+from sqlmodel import SQLModel, Field
+from sqlalchemy import CheckConstraint, Index
+from datetime import datetime
+from typing import List, Literal, Optional
+
+
+class LedgerReason:
+    CREDIT = "credit"
+    REDEMPTION = "redemption"
+    ADJUSTMENT = "adjustment"
+
+
+# Movimientos de puntos (solo inserción); la suma por usuario debe coincidir con su saldo
+class PointsLedger(SQLModel, table=True):
+    __tablename__ = "points_ledger"
+    __table_args__ = (
+        Index("ix_points_ledger_user_id_id", "user_id", "id"),
+        {"schema": "glum"},
+    )
+    id: int = Field(default=None, primary_key=True)
+    user_id: int = Field(foreign_key="glum.user.id")
+    amount: int = Field(...)  # Positivo abona, negativo descuenta
+    balance_after: int = Field(...)  # Saldo resultante tras el movimiento
+    reason: str = Field(..., max_length=20)
+    reference_id: Optional[int] = Field(default=None)  # p. ej. id del canje
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+# Saldo materializado por usuario: se actualiza en la misma sentencia que inserta en el ledger
+class PointsBalance(SQLModel, table=True):
+    __tablename__ = "points_balances"
+    __table_args__ = (
+        CheckConstraint("balance >= 0", name="ck_points_balances_balance_non_negative"),
+        {"schema": "glum"},
+    )
+    user_id: int = Field(foreign_key="glum.user.id", primary_key=True)
+    balance: int = Field(default=0)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class WalletRead(SQLModel):
+    user_id: int
+    balance: int
+    updated_at: Optional[datetime] = None
+
+
+class PointsCredit(SQLModel):
+    amount: int = Field(..., ge=1, le=1000000)
+    # Un abono nunca se registra como canje: esos movimientos llevan el id del canje en reference_id
+    reason: Literal[LedgerReason.CREDIT, LedgerReason.ADJUSTMENT] = LedgerReason.CREDIT
+
+
+class LedgerEntryRead(SQLModel):
+    id: int
+    amount: int
+    balance_after: int
+    reason: str
+    reference_id: Optional[int] = None
+    created_at: datetime
+
+
+class LedgerPage(SQLModel):
+    items: List[LedgerEntryRead]
+    next_cursor: Optional[str] = None
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import Optional, List
 from datetime import datetime
 from enum import Enum
 
@@ -47,11 +47,39 @@ class userPublic(userBase):
         orm_mode = True  # This ensures that the model works with SQLModel
 
 
+# Esquema parcial de userPublic para listados con proyección de campos (?fields=)
+class userPublicFields(BaseModel):
+    id: Optional[int] = None
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    username: Optional[str] = None
+    email: Optional[EmailStr] = None
+    phone_number: Optional[str] = None
+    role: Optional[UserRole] = None
+    email_verify: Optional[bool] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
+# Página de usuarios con cursor opaco para pedir la siguiente
+class userPage(BaseModel):
+    items: List[userPublicFields]
+    next_cursor: Optional[str] = None
+
+
 # Esquema para la respuesta completa, incluye la contraseña en caso de que sea necesario
 class userFull(userPublic):
     password: str  # Solo para casos en los que necesitemos devolver la contraseña, no recomendable
 
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = None
+
+
 class LoginRequestOut(BaseModel):
     username: str
     role: str
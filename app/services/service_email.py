@@ -0,0 +1,255 @@
+import logging
+import smtplib
+import threading
+import time
+from datetime import datetime, timedelta
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import Optional
+
+from sqlalchemy import update
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.core.database import engine
+from app.models.model_email_outbox import EmailOutbox, OutboxStatus
+
+logger = logging.getLogger(__name__)
+
+
+# Contenido del correo de verificación de cuenta
+def build_verification_email(user_email: str, user_name: str) -> tuple[str, str]:
+    subject = 'Verifica tu dirección de correo electrónico'
+    body = f"""
+    Hola {user_name},
+
+    Gracias por registrarte. Por favor, haz clic en el siguiente enlace para verificar tu dirección de correo electrónico:
+
+    http://127.0.0.1:8080/users/users/verify-email/{user_email}  # URL de verificación
+
+    Si no solicitaste este correo, puedes ignorarlo.
+
+    Saludos,
+    El equipo de tu aplicación
+    """
+    return subject, body
+
+
+# Agrega un correo al outbox; se envía cuando la transacción de `db` se confirma
+def enqueue_email(db: Session, recipient: str, subject: str, body: str) -> EmailOutbox:
+    message = EmailOutbox(recipient=recipient, subject=subject, body=body)
+    db.add(message)
+    return message
+
+
+def enqueue_verification_email(db: Session, user_email: str, user_name: str) -> EmailOutbox:
+    subject, body = build_verification_email(user_email, user_name)
+    return enqueue_email(db, user_email, subject, body)
+
+
+class SMTPConnection:
+    """Conexión SMTP autenticada que se reutiliza entre envíos y se reabre si se cae"""
+
+    def __init__(self, host: str, port, user: Optional[str], password: Optional[str], use_tls: bool, idle_check: float = 30):
+        self.host = host
+        self.port = int(port) if port else 25
+        self.user = user
+        self.password = password
+        self.use_tls = use_tls
+        self.idle_check = idle_check
+        self._server: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+        self.connects = 0
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.host, self.port, timeout=30)
+        if self.use_tls:
+            server.starttls()
+        if self.user and self.password:
+            server.login(self.user, self.password)
+        self.connects += 1
+        return server
+
+    def get(self) -> smtplib.SMTP:
+        # Si la conexión lleva tiempo inactiva se comprueba con NOOP antes de usarla
+        if self._server is not None and time.monotonic() - self._last_used > self.idle_check:
+            try:
+                self._server.noop()
+            except smtplib.SMTPException:
+                self.close()
+        if self._server is None:
+            self._server = self._connect()
+        self._last_used = time.monotonic()
+        return self._server
+
+    def send(self, sender: str, recipient: str, message: str):
+        try:
+            self.get().sendmail(sender, recipient, message)
+        except (smtplib.SMTPServerDisconnected, OSError):
+            # Conexión caída: se reabre y se reintenta una vez
+            self.close()
+            self.get().sendmail(sender, recipient, message)
+
+    def close(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._server = None
+
+
+class OutboxDispatcher:
+    """Despacha el outbox de correos en lotes desde un hilo en segundo plano.
+
+    Cada lote se reserva en una transacción corta (FOR UPDATE SKIP LOCKED) que lo pasa a
+    SENDING con un lease; los envíos SMTP se hacen fuera de la transacción y cada correo se
+    marca con su propio commit. Si el worker muere a mitad de lote, los correos no marcados
+    se retoman al vencer el lease: la entrega es al menos una vez, nunca se pierde un correo.
+    """
+
+    def __init__(self):
+        self.connection = SMTPConnection(
+            settings.MAIL_HOST, settings.MAIL_PORT,
+            settings.USER_EMAIL_NOTIFICATIONS, settings.PASSWORD_EMAIL_NOTIFICATIONS,
+            use_tls=settings.MAIL_USE_TLS,
+        )
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self.batches = 0
+        self.last_batch_seconds = 0.0
+        self.last_batch_rate = 0.0  # correos por segundo del último lote
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _build_message(self, item: EmailOutbox) -> str:
+        msg = MIMEMultipart()
+        msg['From'] = settings.USER_EMAIL_NOTIFICATIONS
+        msg['To'] = item.recipient
+        msg['Subject'] = item.subject
+        msg.attach(MIMEText(item.body, 'plain'))
+        return msg.as_string()
+
+    def _backoff(self, attempts: int) -> timedelta:
+        return timedelta(seconds=min(settings.OUTBOX_BACKOFF_SECONDS * 2 ** (attempts - 1), 3600))
+
+    def _claim(self, session: Session) -> list:
+        """Reserva un lote (pendientes o con el lease vencido) y lo confirma antes de enviar"""
+        now = datetime.utcnow()
+        due = (
+            select(EmailOutbox.id)
+            .where(
+                EmailOutbox.status.in_([OutboxStatus.PENDING, OutboxStatus.SENDING]),
+                EmailOutbox.next_attempt_at <= now,
+            )
+            .order_by(EmailOutbox.next_attempt_at)
+            .limit(settings.OUTBOX_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        )
+        statement = (
+            update(EmailOutbox)
+            .where(EmailOutbox.id.in_(due.scalar_subquery()))
+            .values(
+                status=OutboxStatus.SENDING,
+                attempts=EmailOutbox.attempts + 1,
+                next_attempt_at=now + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS),
+            )
+            .returning(EmailOutbox.id, EmailOutbox.recipient, EmailOutbox.subject, EmailOutbox.body, EmailOutbox.attempts)
+        )
+        batch = session.execute(statement).all()
+        session.commit()
+        return sorted(batch, key=lambda item: item.id)
+
+    def _mark(self, session: Session, item, **values):
+        # Solo si el lease sigue siendo nuestro: con el mismo número de intentos que al reservarlo
+        session.execute(
+            update(EmailOutbox)
+            .where(
+                EmailOutbox.id == item.id,
+                EmailOutbox.status == OutboxStatus.SENDING,
+                EmailOutbox.attempts == item.attempts,
+            )
+            .values(**values)
+        )
+        session.commit()
+
+    def dispatch_batch(self) -> int:
+        """Envía un lote de correos pendientes; devuelve cuántos procesó"""
+        started = time.monotonic()
+        with Session(engine) as session:
+            batch = self._claim(session)
+            for position, item in enumerate(batch):
+                try:
+                    self.connection.send(settings.USER_EMAIL_NOTIFICATIONS, item.recipient, self._build_message(item))
+                except (smtplib.SMTPException, OSError) as e:
+                    # Los rechazos permanentes (5xx o destinatario rechazado) o el máximo de intentos no se reintentan
+                    permanent = isinstance(e, smtplib.SMTPRecipientsRefused) or (
+                        isinstance(e, smtplib.SMTPResponseException) and e.smtp_code >= 500
+                    )
+                    if permanent or item.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+                        self._mark(session, item, status=OutboxStatus.FAILED, last_error=str(e)[:500])
+                        self.failed += 1
+                        logger.error("Correo %s descartado tras %s intentos: %s", item.id, item.attempts, e)
+                    else:
+                        self._mark(
+                            session, item, status=OutboxStatus.PENDING, last_error=str(e)[:500],
+                            next_attempt_at=datetime.utcnow() + self._backoff(item.attempts),
+                        )
+                        self.retried += 1
+                        logger.warning("Error al enviar el correo %s, se reintentará: %s", item.id, e)
+                    # Sin conexión con el servidor no tiene sentido seguir: el resto se libera sin contar el intento
+                    if isinstance(e, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, OSError)):
+                        for pending in batch[position + 1:]:
+                            self._mark(
+                                session, pending, status=OutboxStatus.PENDING,
+                                attempts=pending.attempts - 1, next_attempt_at=datetime.utcnow(),
+                            )
+                        break
+                    continue
+                self._mark(session, item, status=OutboxStatus.SENT, sent_at=datetime.utcnow(), last_error=None)
+                self.sent += 1
+
+        if batch:
+            self.batches += 1
+            self.last_batch_seconds = time.monotonic() - started
+            self.last_batch_rate = len(batch) / self.last_batch_seconds if self.last_batch_seconds else 0.0
+        return len(batch)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                processed = self.dispatch_batch()
+            except Exception:
+                logger.exception("Error en el despachador de correos")
+                processed = 0
+            # Con un lote completo se sigue de inmediato; si no, se espera al siguiente sondeo
+            if processed < settings.OUTBOX_BATCH_SIZE:
+                self._stop.wait(settings.OUTBOX_POLL_SECONDS)
+        self.connection.close()
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="email-outbox", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def stats(self) -> dict:
+        return {
+            "sent": self.sent,
+            "retried": self.retried,
+            "failed": self.failed,
+            "batches": self.batches,
+            "smtp_connects": self.connection.connects,
+            "last_batch_seconds": self.last_batch_seconds,
+            "last_batch_rate": self.last_batch_rate,
+        }
+
+
+outbox_dispatcher = OutboxDispatcher()
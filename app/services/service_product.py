@@ -0,0 +1,467 @@
+import csv
+import hashlib
+import io
+from collections import deque
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Iterator, Optional
+
+import orjson
+from fastapi import HTTPException, Response
+from pydantic import ValidationError
+from sqlalchemy import Sequence, insert, literal, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session, select, func
+from starlette.concurrency import run_in_threadpool
+
+from app.core.cache import build_cache_backend
+from app.core.config import settings
+from app.core.database import engine, replicas
+from app.core.fields import project_columns
+from app.models.model_category import Categories
+from app.models.model_product import Products, ProductRead, ProductCreate, ProductRedemptions, ProductTombstones
+
+# Cache del resumen de productos (ya serializado) por compañía
+catalog_cache = build_cache_backend(
+    settings.CATALOG_CACHE_BACKEND,
+    maxsize=settings.CATALOG_CACHE_MAXSIZE,
+    ttl=settings.CATALOG_CACHE_TTL,
+    url=settings.CATALOG_CACHE_URL,
+    prefix="glum:catalog:",
+)
+
+
+def summary_statement(company_id: int):
+    """Consulta del resumen de productos de una compañía (Products ⋈ Categories)"""
+    return (
+        select(
+            Products.id,
+            Products.product_name,
+            Products.category_id,
+            Categories.category_name.label("category_name"),
+            Products.points_value,
+            Products.image_url
+        )
+        .join(Categories, Categories.id == Products.category_id)
+        .where(Products.company_id == company_id)
+    )
+
+
+def summary_version_statement(company_id: int):
+    """Número de productos y última modificación (productos y categorías) de una compañía, para el ETag"""
+    return (
+        select(func.count(Products.id), func.max(Products.updated_at), func.max(Categories.updated_at))
+        .join(Categories, Categories.id == Products.category_id)
+        .where(Products.company_id == company_id)
+    )
+
+
+def db_utcnow():
+    """Hora UTC de la BD en el momento de ejecutar la sentencia (misma fuente que los server_default)"""
+    return func.timezone("utc", func.clock_timestamp())
+
+
+def changes_statements(company_id: int, since: datetime):
+    """Consultas de la sincronización incremental: productos creados o modificados y borrados desde `since`,
+    y el límite superior del watermark (hora de la BD menos CHANGES_SAFETY_LAG_SECONDS)"""
+    upserted = select(Products.id, Products.updated_at).where(Products.company_id == company_id, Products.updated_at > since)
+    deleted = (
+        select(ProductTombstones.product_id, ProductTombstones.deleted_at)
+        .where(ProductTombstones.company_id == company_id, ProductTombstones.deleted_at > since)
+    )
+    cutoff = select(db_utcnow() - timedelta(seconds=settings.CHANGES_SAFETY_LAG_SECONDS))
+    return upserted, deleted, cutoff
+
+
+def changes_payload(since: datetime, cutoff: datetime, upserted, deleted) -> dict:
+    """Respuesta de /changes con la forma de ProductChanges.
+
+    Una transacción que fechó un cambio y aún no lo confirmó no es visible en esta lectura; para no
+    saltarla, el watermark nunca pasa de `cutoff`. Los cambios entre el watermark y la última fecha
+    vista se vuelven a enviar en la siguiente consulta (los ids son idempotentes).
+    """
+    latest = max([since] + [r.updated_at for r in upserted] + [r.deleted_at for r in deleted])
+    watermark = max(since, min(latest, cutoff))
+    return {"upserted": [r.id for r in upserted], "deleted": [r.product_id for r in deleted], "watermark": watermark}
+
+
+def update_product_statement(product_id: int, product_data: dict, version: Optional[int] = None):
+    """UPDATE ... RETURNING del producto: un solo viaje, sin leerlo antes ni refrescarlo después.
+
+    Con `version` solo actualiza si nadie lo modificó desde entonces (sin bloquear la fila).
+    """
+    statement = update(Products).where(Products.id == product_id)
+    if version is not None:
+        statement = statement.where(Products.version == version)
+    return statement.values(**product_data, updated_at=db_utcnow(), version=Products.version + 1).returning(Products)
+
+
+# Secuencia del id de los canjes: el id se reserva antes del cargo para referenciarlo en el ledger
+REDEMPTION_ID_SEQUENCE = Sequence("product_redemptions_id_seq", schema="glum")
+
+
+def redemption_quote_statement(product_id: int, quantity: int):
+    """Id reservado para el canje y puntos que cuesta, leídos sin bloquear la fila del producto.
+
+    Si el producto no existe no devuelve filas.
+    """
+    return select(
+        REDEMPTION_ID_SEQUENCE.next_value().label("id"),
+        (Products.points_value * quantity).label("points"),
+    ).where(Products.id == product_id)
+
+
+def redeem_statement(product_id: int, user_id: int, quantity: int, redemption_id: int, points: int):
+    """Canje en una sola sentencia: descuenta existencias solo si alcanzan y registra el canje.
+
+    Se ejecuta después del cargo en el monedero, como última sentencia antes del commit: el bloqueo
+    de la fila del producto (la más disputada) dura solo esta sentencia y el commit. El UPDATE
+    condicional no necesita leer antes la fila ni bloquearla con FOR UPDATE. Si no hay existencias,
+    o el precio cambió desde redemption_quote_statement, no devuelve filas.
+    """
+    now = db_utcnow()
+    decrement = (
+        update(Products)
+        .where(
+            Products.id == product_id,
+            Products.stock_quantity >= quantity,
+            Products.points_value * quantity == points,
+        )
+        .values(stock_quantity=Products.stock_quantity - quantity, version=Products.version + 1, updated_at=now)
+        .returning(Products.id, Products.company_id, Products.stock_quantity)
+        .cte("decrement")
+    )
+    redemption = (
+        insert(ProductRedemptions)
+        .from_select(
+            ["id", "product_id", "user_id", "company_id", "quantity", "points", "created_at"],
+            select(
+                literal(redemption_id), decrement.c.id, literal(user_id), decrement.c.company_id,
+                literal(quantity), literal(points), now,
+            ),
+        )
+        .returning(*ProductRedemptions.__table__.c)
+        .cte("redemption")
+    )
+    return select(
+        redemption.c.id, redemption.c.product_id, redemption.c.quantity, redemption.c.points,
+        decrement.c.stock_quantity, redemption.c.created_at,
+    ).select_from(redemption.join(decrement, decrement.c.id == redemption.c.product_id))
+
+
+def make_etag(*parts) -> str:
+    """ETag fuerte a partir de los valores que identifican la versión del recurso"""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'"{digest}"'
+
+
+def summary_etag(company_id: int, version) -> str:
+    count, products_updated_at, categories_updated_at = version
+    return make_etag("summary", company_id, count, products_updated_at, categories_updated_at)
+
+
+def not_modified(if_none_match: Optional[str], etag: str) -> Optional[Response]:
+    """Devuelve una respuesta 304 si el cliente ya tiene la versión actual (If-None-Match)"""
+    if not if_none_match:
+        return None
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    if "*" in candidates or etag in candidates:
+        return Response(status_code=304, headers={"ETag": etag})
+    return None
+
+
+def serialize_summary(rows) -> bytes:
+    """Serializa las filas del resumen con la forma de ProductSummary"""
+    return orjson.dumps([row._asdict() for row in rows])
+
+
+def get_cached_summary(company_id: int) -> Optional[tuple[str, bytes]]:
+    """Devuelve (etag, body) del cache o None"""
+    cached = catalog_cache.get(str(company_id))
+    if cached is None:
+        return None
+    etag, _, body = cached.partition(b"\n")
+    return etag.decode("ascii"), body
+
+
+def set_cached_summary(company_id: int, etag: str, body: bytes):
+    catalog_cache.set(str(company_id), etag.encode("ascii") + b"\n" + body)
+
+
+def invalidate_catalog(company_id: int):
+    """Se llama después de crear, actualizar o borrar un producto de la compañía"""
+    catalog_cache.delete(str(company_id))
+
+
+# Variantes para código asíncrono: un backend bloqueante (Redis) se llama en el threadpool
+async def _cache_call(function, *args):
+    if catalog_cache.blocking:
+        return await run_in_threadpool(function, *args)
+    return function(*args)
+
+
+async def aget_cached_summary(company_id: int) -> Optional[tuple[str, bytes]]:
+    return await _cache_call(get_cached_summary, company_id)
+
+
+async def aset_cached_summary(company_id: int, etag: str, body: bytes):
+    await _cache_call(set_cached_summary, company_id, etag, body)
+
+
+async def ainvalidate_catalog(company_id: int):
+    await _cache_call(invalidate_catalog, company_id)
+
+
+# Columnas de Products que se pueden leer o exportar
+EXPORT_FIELDS = list(ProductRead.model_fields)
+
+
+def product_fields_statement(product_id: int, fields: Optional[str] = None):
+    """Lectura de un producto con solo las columnas pedidas (`?fields=`), sin cargar la entidad.
+
+    Se añade la versión para el ETag.
+    """
+    return select(*project_columns(Products, fields, EXPORT_FIELDS), Products.version).where(Products.id == product_id)
+
+
+def export_products(company_id: int, columns: list, fmt: str) -> Iterator[bytes]:
+    """Genera la exportación de productos de una compañía por lotes (NDJSON o CSV).
+
+    Usa su propia sesión con cursor de servidor (yield_per), porque la sesión de la
+    petición se cierra antes de que termine el envío de la respuesta.
+    """
+    names = [column.key for column in columns]
+    statement = (
+        select(*columns)
+        .where(Products.company_id == company_id)
+        .order_by(Products.id)
+        .execution_options(yield_per=settings.EXPORT_BATCH_SIZE)
+    )
+    with Session(replicas.choose() or engine) as session:
+        result = session.execute(statement)
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(names)
+            for partition in result.partitions():
+                writer.writerows(partition)
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+            if buffer.tell():
+                yield buffer.getvalue().encode("utf-8")
+        else:
+            for partition in result.partitions():
+                yield b"".join(orjson.dumps(dict(zip(names, row))) + b"\n" for row in partition)
+
+
+async def _stream_lines(stream: AsyncIterator[bytes], max_line: int) -> AsyncIterator[Optional[bytes]]:
+    """Parte el cuerpo de la petición en líneas (bytes) a medida que llega, sin acumularlo completo.
+
+    Una línea de más de `max_line` bytes no se guarda: se descarta hasta el siguiente salto de
+    línea y en su lugar se produce None.
+    """
+    pending = bytearray()
+    oversized = False
+    async for chunk in stream:
+        searched = len(pending)
+        pending += chunk
+        start = 0
+        while (end := pending.find(b"\n", max(start, searched))) != -1:
+            if oversized or end - start > max_line:
+                yield None
+            else:
+                yield bytes(pending[start:end]).rstrip(b"\r")
+            oversized = False
+            start = end + 1
+        del pending[:start]
+        if len(pending) > max_line:
+            pending.clear()
+            oversized = True
+    if oversized:
+        yield None
+    elif pending:
+        yield bytes(pending).rstrip(b"\r")
+
+
+class _CSVFeed:
+    """Líneas pendientes para un único csv.reader.
+
+    Un registro CSV puede ocupar varias líneas (campo entre comillas con saltos de línea): se
+    acumulan hasta que las comillas quedan balanceadas y entonces el reader consume el registro.
+    """
+
+    def __init__(self):
+        self._lines: deque[str] = deque()
+        self._quotes = 0
+        self.size = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self._lines:
+            raise StopIteration
+        return self._lines.popleft()
+
+    def push(self, line: str):
+        self._lines.append(line + "\n")
+        self._quotes += line.count('"')
+        self.size += len(line) + 1
+
+    def complete(self) -> bool:
+        return self._quotes % 2 == 0
+
+    def clear(self):
+        self._lines.clear()
+        self._quotes = 0
+        self.size = 0
+
+    def __bool__(self) -> bool:
+        return bool(self._lines)
+
+
+async def _parse_rows(stream: AsyncIterator[bytes], fmt: str) -> AsyncIterator[tuple[int, dict | None, str | None]]:
+    """Produce (número de fila, datos, error de formato) para cada fila NDJSON o CSV"""
+    header = None
+    row_number = 0
+    feed = _CSVFeed()
+    reader = csv.reader(feed)
+    max_line = settings.BULK_MAX_LINE_BYTES
+    too_long = f"Fila mal formada: supera el máximo de {max_line} bytes"
+    async for raw in _stream_lines(stream, max_line):
+        if raw is None:
+            if fmt == "csv" and header is None:
+                raise HTTPException(status_code=413, detail=f"La cabecera CSV supera el máximo de {max_line} bytes")
+            # La línea se descarta junto con el registro CSV que estuviera a medias
+            feed.clear()
+            row_number += 1
+            yield row_number, None, too_long
+            continue
+        try:
+            line = raw.decode("utf-8")
+        except UnicodeDecodeError as e:
+            if fmt == "csv" and header is None:
+                raise HTTPException(status_code=400, detail="La cabecera CSV no es UTF-8 válido")
+            # La línea se descarta junto con el registro CSV que estuviera a medias
+            feed.clear()
+            row_number += 1
+            yield row_number, None, f"Fila mal formada: {e}"
+            continue
+
+        if fmt != "csv":
+            if not line.strip():
+                continue
+            row_number += 1
+            try:
+                data = orjson.loads(line)
+            except ValueError as e:
+                yield row_number, None, f"Fila mal formada: {e}"
+                continue
+            yield row_number, data, None
+            continue
+
+        if not feed and not line.strip():
+            continue
+        feed.push(line)
+        if not feed.complete():
+            # Un registro con comillas sin cerrar tampoco puede crecer sin límite
+            if feed.size > max_line:
+                if header is None:
+                    raise HTTPException(status_code=413, detail=f"La cabecera CSV supera el máximo de {max_line} bytes")
+                feed.clear()
+                row_number += 1
+                yield row_number, None, too_long
+            continue
+        try:
+            values = next(reader)
+        except csv.Error as e:
+            feed.clear()
+            if header is None:
+                raise HTTPException(status_code=400, detail=f"Cabecera CSV no válida: {e}")
+            row_number += 1
+            yield row_number, None, f"Fila mal formada: {e}"
+            continue
+        if header is None:
+            header = values
+            continue
+        row_number += 1
+        if len(values) != len(header):
+            yield row_number, None, f"Fila mal formada: se esperaban {len(header)} columnas"
+        else:
+            yield row_number, dict(zip(header, values)), None
+
+    if feed:
+        row_number += 1
+        yield row_number, None, "Fila mal formada: comillas sin cerrar"
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(loc) for loc in item['loc'])}: {item['msg']}" for item in error.errors())
+
+
+def _insert_batch(session: Session, rows: list[dict]):
+    # INSERT multi-fila (insertmanyvalues) en un solo viaje por lote
+    session.execute(insert(Products), rows)
+
+
+async def import_products(session: Session, stream: AsyncIterator[bytes], fmt: str, atomic: bool) -> dict:
+    """Carga masiva de productos validando por lotes contra ProductCreate.
+
+    atomic=True: todo o nada, cualquier error revierte la carga completa.
+    atomic=False: se confirma cada lote; las filas inválidas se omiten y si un lote falla
+    en la BD se reportan todas sus filas.
+    """
+    errors: list[dict] = []
+    received = inserted = 0
+    companies: set[int] = set()
+    batch: list[tuple[int, dict]] = []
+
+    async def flush():
+        nonlocal inserted
+        if not batch or (atomic and errors):
+            batch.clear()
+            return
+        rows = [data for _, data in batch]
+        try:
+            await run_in_threadpool(_insert_batch, session, rows)
+            if not atomic:
+                await run_in_threadpool(session.commit)
+            inserted += len(rows)
+            companies.update(data["company_id"] for data in rows)
+        except SQLAlchemyError as e:
+            await run_in_threadpool(session.rollback)
+            message = f"Error de base de datos: {e.__class__.__name__}"
+            errors.extend({"row": row_number, "error": message} for row_number, _ in batch)
+        batch.clear()
+
+    async for row_number, data, error in _parse_rows(stream, fmt):
+        received += 1
+        if error is None:
+            try:
+                batch.append((row_number, ProductCreate.model_validate(data).model_dump()))
+            except ValidationError as e:
+                error = _validation_message(e)
+        if error is not None:
+            errors.append({"row": row_number, "error": error})
+        if len(batch) >= settings.BULK_BATCH_SIZE:
+            await flush()
+    await flush()
+
+    if atomic:
+        if errors:
+            await run_in_threadpool(session.rollback)
+            inserted = 0
+            companies.clear()
+        else:
+            await run_in_threadpool(session.commit)
+
+    for company_id in companies:
+        await ainvalidate_catalog(company_id)
+
+    return {
+        "mode": "atomic" if atomic else "best_effort",
+        "received": received,
+        "inserted": inserted,
+        "failed": received - inserted,
+        "errors": errors,
+    }
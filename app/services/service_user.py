@@ -1,38 +1,120 @@
 from fastapi import HTTPException, status, Query
+from sqlalchemy import insert, literal, or_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlmodel import Session, select
 from typing import Optional, Annotated
 from datetime import datetime, timedelta
-import smtplib
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
+from starlette.concurrency import run_in_threadpool
 
-from app.core.config import settings
+from app.core.fields import project_columns
+from app.core.pagination import encode_cursor, decode_cursor
 from app.models.model_user import User
-from app.schemas.schema_user import userCreate, userPublic, userUpdate
+from app.schemas.schema_user import userCreate, userPublic, userUpdate, userPublicFields
 from app.core.auth import hash_password, verify_password
+from app.core.revocation import revocation_store
+from app.core.versioning import row_with_etag, version_conflict
+from app.models.model_email_outbox import EmailOutbox
+from app.services.service_email import build_verification_email, enqueue_verification_email
 from passlib.context import CryptContext
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
-# Crear una nueva cuenta de usuario
-def create_user(db: Session, user_create: userCreate) -> User:
-
+# Sentencia única de alta: inserta el usuario y su correo de verificación en el outbox.
+# ON CONFLICT DO NOTHING se apoya en los índices únicos (username, email, teléfono): si ya
+# existe no se inserta nada y no devuelve filas.
+def create_user_statement(user_create: userCreate):
     new_user = User(**user_create.dict())
-
-    db.add(new_user)
+    subject, body = build_verification_email(new_user.email, new_user.first_name)
+    message = EmailOutbox(recipient=new_user.email, subject=subject, body=body)
+
+    user_cte = (
+        pg_insert(User)
+        .values(**new_user.model_dump(exclude={"id"}))
+        .on_conflict_do_nothing()
+        .returning(*User.__table__.c)
+        .cte("new_user")
+    )
+    outbox_values = message.model_dump(exclude={"id"})
+    outbox_cte = (
+        insert(EmailOutbox)
+        .from_select(list(outbox_values), select(*(literal(value) for value in outbox_values.values())).select_from(user_cte))
+        .cte("new_email")
+    )
+    return select(user_cte).add_cte(outbox_cte)
+
+
+# Crear una nueva cuenta de usuario; devuelve None si el usuario ya existe
+def create_user(db: Session, user_create: userCreate) -> User | None:
+    row = db.execute(create_user_statement(user_create)).first()
     db.commit()
-    db.refresh(new_user)
+    return User(**row._mapping) if row else None
+
+
+# Campos con índice único que pueden hacer fallar el alta
+UNIQUE_USER_FIELDS = {"username": "Username", "email": "Email", "phone_number": "Phone number"}
+
+
+# Consulta de seguimiento cuando el alta no insertó nada: qué cuentas ocupan los valores únicos
+def user_conflict_statement(user_create: userCreate):
+    columns = [getattr(User, name) for name in UNIQUE_USER_FIELDS]
+    return select(*columns).where(or_(*(column == getattr(user_create, column.key) for column in columns)))
+
+
+# 400 indicando qué campo ya está registrado
+def user_conflict(rows, user_create: userCreate) -> HTTPException:
+    taken = [
+        label for name, label in UNIQUE_USER_FIELDS.items()
+        if any(getattr(row, name) == getattr(user_create, name) for row in rows)
+    ]
+    detail = f"{', '.join(taken)} already registered" if taken else "User already registered"
+    return HTTPException(status_code=400, detail=detail)
+
+
+def create_user_conflict(db: Session, user_create: userCreate) -> HTTPException:
+    return user_conflict(db.exec(user_conflict_statement(user_create)).all(), user_create)
+
+
+# Campos de User que se pueden exponer en los listados
+USER_PUBLIC_FIELDS = list(userPublicFields.model_fields)
+
 
-     # Enviar el correo de verificación después de crear el usuario
-    send_verification_email(new_user.email, new_user.first_name)
+# Columnas públicas a seleccionar; email_verify se guarda como entero pero se publica como booleano,
+# así las filas salen ya con la forma del esquema y se pueden codificar sin revalidarlas
+def user_public_columns(fields: Optional[str] = None) -> list:
+    return [
+        (User.email_verify == 1).label("email_verify") if column.key == "email_verify" else column
+        for column in project_columns(User, fields, USER_PUBLIC_FIELDS)
+    ]
 
-    return new_user
 
+# Sentencia de listado paginado por keyset sobre id (se pide un registro extra para saber si hay más)
+def users_page_statement(cursor: Optional[str], limit: int, fields: Optional[str] = None):
+    stmt = select(*user_public_columns(fields)).order_by(User.id).limit(limit + 1)
+    if cursor:
+        stmt = stmt.where(User.id > decode_cursor(cursor))
+    return stmt
 
-# Consultar todos los usuarios
-def get_users(db: Session, offset: int = 0, limit: int = 100):
-    query = db.query(User)
-    return query.all()
+
+def users_page(rows, limit: int) -> tuple[list[dict], Optional[str]]:
+    next_cursor = encode_cursor(rows[limit - 1].id) if len(rows) > limit else None
+    return [row._asdict() for row in rows[:limit]], next_cursor
+
+
+# Consultar los usuarios por páginas
+def get_users(db: Session, cursor: Optional[str] = None, limit: int = 100, fields: Optional[str] = None):
+    rows = db.exec(users_page_statement(cursor, limit, fields)).all()
+    return users_page(rows, limit)
+
+
+# Lectura de una cuenta con solo las columnas públicas pedidas (`?fields=`), sin cargar la entidad
+# ni password_hash; se añade la versión para el ETag
+def user_fields_statement(where, fields: Optional[str] = None):
+    return select(*user_public_columns(fields), User.version).where(where)
+
+
+def get_user_fields(db: Session, where, fields: Optional[str] = None) -> Optional[tuple[dict, str]]:
+    row = db.exec(user_fields_statement(where, fields)).first()
+    return row_with_etag(row) if row else None
 
 
 # Función para obtener una cuenta por id
@@ -54,31 +136,39 @@ def get_user_by_phone(db: Session, phone: str) -> User | None:
     return db_user
 
 
+# Sentencia UPDATE ... RETURNING de la cuenta (un solo viaje, sin leerla antes ni refrescarla después).
+# Con `version` solo se aplica si la cuenta no cambió desde esa versión (concurrencia optimista)
+def update_user_statement(user_id: int, user_data: dict, version: Optional[int] = None):
+    statement = update(User).where(User.id == user_id)
+    if version is not None:
+        statement = statement.where(User.version == version)
+    return statement.values(**user_data, updated_at=datetime.utcnow(), version=User.version + 1).returning(User)
+
+
 # Función para actualizar una cuenta de usuario
-def update_user(db: Session, user_id: int, user_update: userUpdate) -> User | None:
- 
-    db_user = db.get(User, user_id)
-    
-    if not db_user:
-        return None
-    
+def update_user(db: Session, user_id: int, user_update: userUpdate, version: Optional[int] = None) -> User | None:
+
     # Actualizar los campos que se proporcionan en user_update
     user_data = user_update.model_dump(exclude_unset=True)  # Excluir los campos no proporcionados
-    
+
     # Hashear el password si viene en la actualización (cambio de clave)
     if "password" in user_data:
-        user_data["password"] = hash_password(user_data["password"])
-
-    # Actualizar los valores de la cuenta
-    for key, value in user_data.items():
-        setattr(db_user, key, value)
+        user_data["password_hash"] = hash_password(user_data.pop("password"))
 
-    db_user.updated_at = datetime.utcnow()
-    
-    db.add(db_user)
+    db_user = db.execute(update_user_statement(user_id, user_data, version)).scalar_one_or_none()
+    if not db_user:
+        # Sin fila actualizada: la cuenta no existe o cambió de versión
+        if version is not None and db.exec(select(User.id).where(User.id == user_id)).first():
+            raise version_conflict()
+        return None
+    # Con una nueva contraseña los tokens emitidos antes dejan de valer (en todos los workers)
+    if "password_hash" in user_data:
+        db.execute(revocation_store.revoke_subject_statement(db_user.username))
     db.commit()
-    db.refresh(db_user)
-    
+
+    if "password_hash" in user_data:
+        revocation_store.remember_subject(db_user.username)
+
     return db_user
 
 
@@ -93,55 +183,14 @@ def authenticate_user(db: Session, username: str, password: str):
     
     return db_user
 
-async def send_email(user: User):
-    subject = "Verificación de Email"
-    body = f"Hola, {user.email}. Haz clic en el siguiente enlace para verificar tu cuenta: [enlace de verificación]"
-    send_verification_email(user.email, user.first_name)
+async def send_email(db: Session, user: User):
+    """Encola el correo de verificación; lo envía el despachador del outbox"""
+    def enqueue():
+        enqueue_verification_email(db, user.email, user.first_name)
+        db.commit()
+    await run_in_threadpool(enqueue)
     return {"message": "Correo de verificación enviado"}
 
-# Función para enviar un correo de verificación
-def send_verification_email(user_email: str, user_name: str):
-    # Datos del correo
-    sender_email = settings.USER_EMAIL_NOTIFICATIONS
-    sender_password = settings.PASSWORD_EMAIL_NOTIFICATIONS
-    smtp_server = settings.MAIL_HOST
-    smtp_port = settings.MAIL_PORT
-
-    # Crear el mensaje
-    msg = MIMEMultipart()
-    msg['From'] = sender_email
-    msg['To'] = user_email
-    msg['Subject'] = 'Verifica tu dirección de correo electrónico'
-
-    # Cuerpo del correo
-    body = f"""
-    Hola {user_name},
-
-    Gracias por registrarte. Por favor, haz clic en el siguiente enlace para verificar tu dirección de correo electrónico:
-
-    http://127.0.0.1:8080/users/users/verify-email/{user_email}  # URL de verificación
-
-    Si no solicitaste este correo, puedes ignorarlo.
-
-    Saludos,
-    El equipo de tu aplicación
-    """
-    
-    msg.attach(MIMEText(body, 'plain'))
-
-    try:
-        # Conectar al servidor SMTP de Gmail y enviar el correo
-        server = smtplib.SMTP(smtp_server, smtp_port)
-        server.starttls()  # Usar TLS para la seguridad de la conexión
-        server.login(sender_email, sender_password)
-        server.sendmail(sender_email, user_email, msg.as_string())
-        server.quit()
-        print(f"Correo de verificación enviado a {user_email}")
-    except Exception as e:
-        print(f"Error al enviar el correo: {e}")
-        raise HTTPException(status_code=500, detail="Error al enviar el correo de verificación.")
-
-
 
 """ Función para enviar el correo electrónico
 def send_verification_email_bkp(to_email, subject, body):
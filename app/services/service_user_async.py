@@ -0,0 +1,80 @@
+from fastapi import HTTPException
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import Optional
+
+from app.models.model_user import User
+from app.schemas.schema_user import userCreate, userUpdate
+from app.core.auth import ahash_password
+from app.core.revocation import revocation_store
+from app.core.versioning import row_with_etag, version_conflict
+from app.services.service_user import create_user_statement, user_conflict_statement, user_conflict, update_user_statement, users_page_statement, users_page, user_fields_statement
+
+# Variantes asíncronas (AsyncSession) de app.services.service_user, usadas cuando DB_MODE=async
+
+
+# Crear una nueva cuenta de usuario; devuelve None si el usuario ya existe
+async def create_user(db: AsyncSession, user_create: userCreate) -> User | None:
+    row = (await db.execute(create_user_statement(user_create))).first()
+    await db.commit()
+    return User(**row._mapping) if row else None
+
+
+async def create_user_conflict(db: AsyncSession, user_create: userCreate) -> HTTPException:
+    return user_conflict((await db.exec(user_conflict_statement(user_create))).all(), user_create)
+
+
+# Consultar los usuarios por páginas
+async def get_users(db: AsyncSession, cursor: Optional[str] = None, limit: int = 100, fields: Optional[str] = None):
+    rows = (await db.exec(users_page_statement(cursor, limit, fields))).all()
+    return users_page(rows, limit)
+
+
+# Lectura de una cuenta con solo las columnas pedidas (`?fields=`), sin cargar la entidad
+async def get_user_fields(db: AsyncSession, where, fields: Optional[str] = None) -> Optional[tuple[dict, str]]:
+    row = (await db.exec(user_fields_statement(where, fields))).first()
+    return row_with_etag(row) if row else None
+
+
+# Función para obtener una cuenta por id
+async def get_user_id(db: AsyncSession, id: int):
+    return await db.get(User, id)
+
+
+# Función para obtener una cuenta por correo electrónico
+async def get_user_by_email(db: AsyncSession, email: str) -> User | None:
+    result = await db.exec(select(User).where(User.email == email))
+    return result.first()
+
+
+# Función para obtener una cuenta por numero celular
+async def get_user_by_phone(db: AsyncSession, phone: str) -> User | None:
+    result = await db.exec(select(User).where(User.phone_number == phone))
+    return result.first()
+
+
+# Función para actualizar una cuenta de usuario
+async def update_user(db: AsyncSession, user_id: int, user_update: userUpdate, version: Optional[int] = None) -> User | None:
+
+    # Actualizar los campos que se proporcionan en user_update
+    user_data = user_update.model_dump(exclude_unset=True)
+
+    # Hashear el password si viene en la actualización (cambio de clave)
+    if "password" in user_data:
+        user_data["password_hash"] = await ahash_password(user_data.pop("password"))
+
+    db_user = (await db.execute(update_user_statement(user_id, user_data, version))).scalar_one_or_none()
+    if not db_user:
+        # Sin fila actualizada: la cuenta no existe o cambió de versión
+        if version is not None and (await db.exec(select(User.id).where(User.id == user_id))).first():
+            raise version_conflict()
+        return None
+    # Con una nueva contraseña los tokens emitidos antes dejan de valer (en todos los workers)
+    if "password_hash" in user_data:
+        await db.execute(revocation_store.revoke_subject_statement(db_user.username))
+    await db.commit()
+
+    if "password_hash" in user_data:
+        revocation_store.remember_subject(db_user.username)
+
+    return db_user
@@ -0,0 +1,174 @@
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Integer, func, insert, literal, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.core.database import engine
+from app.core.pagination import encode_cursor, decode_cursor
+from app.models.model_wallet import PointsBalance, PointsLedger
+
+logger = logging.getLogger(__name__)
+
+# Clave del advisory lock de la conciliación (un solo worker la ejecuta en cada ciclo)
+RECONCILE_LOCK_KEY = 720011
+
+
+def apply_points_statement(user_id: int, amount: int, reason: str, reference_id: Optional[int] = None):
+    """Movimiento de puntos en una sola sentencia: actualiza el saldo y añade la entrada al ledger.
+
+    Los abonos crean el saldo si no existe; los cargos solo se aplican si el saldo alcanza.
+    Si no se aplica no devuelve filas y no se inserta nada en el ledger.
+    """
+    now = datetime.utcnow()
+    if amount >= 0:
+        balance = (
+            pg_insert(PointsBalance)
+            .values(user_id=user_id, balance=amount, updated_at=now)
+            .on_conflict_do_update(
+                index_elements=[PointsBalance.user_id],
+                set_={"balance": PointsBalance.balance + amount, "updated_at": now},
+            )
+        )
+    else:
+        balance = (
+            update(PointsBalance)
+            .where(PointsBalance.user_id == user_id, PointsBalance.balance >= -amount)
+            .values(balance=PointsBalance.balance + amount, updated_at=now)
+        )
+    balance = balance.returning(PointsBalance.balance).cte("balance")
+    return (
+        insert(PointsLedger)
+        .from_select(
+            ["user_id", "amount", "balance_after", "reason", "reference_id", "created_at"],
+            select(
+                literal(user_id), literal(amount), balance.c.balance, literal(reason),
+                literal(reference_id, Integer), literal(now),
+            ),
+        )
+        .returning(*PointsLedger.__table__.c)
+    )
+
+
+# Saldo actual: lectura por clave primaria, sin sumar el ledger
+def get_wallet(db: Session, user_id: int) -> Optional[PointsBalance]:
+    return db.get(PointsBalance, user_id)
+
+
+# Movimientos del usuario, del más reciente al más antiguo (paginado por keyset sobre id)
+def ledger_page_statement(user_id: int, cursor: Optional[str], limit: int):
+    statement = (
+        select(*PointsLedger.__table__.c)
+        .where(PointsLedger.user_id == user_id)
+        .order_by(PointsLedger.id.desc())
+        .limit(limit + 1)
+    )
+    if cursor:
+        statement = statement.where(PointsLedger.id < decode_cursor(cursor))
+    return statement
+
+
+def get_ledger(db: Session, user_id: int, cursor: Optional[str] = None, limit: int = 100):
+    rows = db.exec(ledger_page_statement(user_id, cursor, limit)).all()
+    next_cursor = encode_cursor(rows[limit - 1].id) if len(rows) > limit else None
+    return [row._asdict() for row in rows[:limit]], next_cursor
+
+
+def reconcile_statement():
+    """Usuarios cuyo saldo materializado no coincide con la suma de su ledger"""
+    totals = (
+        select(PointsLedger.user_id, func.sum(PointsLedger.amount).label("total"))
+        .group_by(PointsLedger.user_id)
+        .subquery()
+    )
+    balance = func.coalesce(PointsBalance.balance, 0)
+    total = func.coalesce(totals.c.total, 0)
+    return (
+        select(
+            func.coalesce(PointsBalance.user_id, totals.c.user_id).label("user_id"),
+            balance.label("balance"),
+            total.label("ledger_total"),
+        )
+        .select_from(PointsBalance.__table__.join(totals, totals.c.user_id == PointsBalance.user_id, full=True))
+        .where(balance != total)
+    )
+
+
+def reconcile(session: Session, fix: bool = False) -> list[dict]:
+    """Compara saldos y ledger; con `fix` corrige el saldo con la suma del ledger (fuente de verdad).
+
+    La corrección debe ejecutarse sin movimientos en curso (p. ej. desde `python -m app.manage`).
+    """
+    mismatches = [row._asdict() for row in session.exec(reconcile_statement()).all()]
+    if fix:
+        now = datetime.utcnow()
+        for item in mismatches:
+            session.execute(
+                pg_insert(PointsBalance)
+                .values(user_id=item["user_id"], balance=item["ledger_total"], updated_at=now)
+                .on_conflict_do_update(
+                    index_elements=[PointsBalance.user_id],
+                    set_={"balance": item["ledger_total"], "updated_at": now},
+                )
+            )
+        session.commit()
+    return mismatches
+
+
+class WalletReconciler:
+    """Conciliación periódica en segundo plano; solo informa de las diferencias (no corrige)"""
+
+    def __init__(self):
+        self.runs = 0
+        self.mismatches = 0
+        self.last_run_seconds = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self) -> Optional[int]:
+        """Ejecuta una conciliación si ningún otro worker la está haciendo; devuelve las diferencias"""
+        started = time.monotonic()
+        with Session(engine) as session:
+            if not session.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": RECONCILE_LOCK_KEY}).scalar():
+                return None
+            mismatches = reconcile(session)
+        for item in mismatches:
+            logger.error("Saldo de puntos descuadrado para el usuario %s: saldo %s, ledger %s", item["user_id"], item["balance"], item["ledger_total"])
+        self.runs += 1
+        self.mismatches = len(mismatches)
+        self.last_run_seconds = time.monotonic() - started
+        return len(mismatches)
+
+    def _run(self):
+        while not self._stop.wait(settings.WALLET_RECONCILE_SECONDS):
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("Error en la conciliación de puntos")
+
+    def start(self):
+        if self._thread is None and settings.WALLET_RECONCILE_SECONDS > 0:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="wallet-reconciler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def stats(self) -> dict:
+        return {
+            "runs": self.runs,
+            "mismatches": self.mismatches,
+            "last_run_seconds": self.last_run_seconds,
+        }
+
+
+wallet_reconciler = WalletReconciler()
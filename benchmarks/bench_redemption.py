@@ -0,0 +1,129 @@
+"""Canjes concurrentes sobre un mismo producto (fila caliente): orden anterior frente al actual.
+
+- stock-primero (anterior): descuento de existencias, cargo en el monedero, commit. La fila del
+  producto queda bloqueada durante el cargo.
+- cargo-primero (actual): cargo en el monedero, descuento de existencias, commit. La fila del
+  producto solo se bloquea durante la última sentencia y el commit.
+
+Cada hilo es un usuario distinto con saldo de sobra, así la única contención es la del producto.
+--rtt-ms simula la latencia de red entre la API y la BD (una espera tras cada sentencia).
+Usa la BD configurada en el entorno y borra al terminar los datos que crea.
+
+    python -m benchmarks.bench_redemption [--threads 1,8,32] [--seconds 5] [--rtt-ms 0]
+"""
+import argparse
+import statistics
+import threading
+import time
+
+from sqlalchemy import create_engine, text
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.models.model_wallet import LedgerReason
+from app.services.service_product import redemption_quote_statement, redeem_statement
+from app.services.service_wallet import apply_points_statement
+
+COMPANY_ID = 99998
+
+
+def setup(conn, users: int) -> tuple[int, list[int]]:
+    category_id = conn.execute(text("""
+        INSERT INTO glum.categories (company_id, category_name, description, status, created_at, updated_at)
+        VALUES (:company_id, 'Benchmark', 'benchmark', 1, now(), now()) RETURNING id
+    """), {"company_id": COMPANY_ID}).scalar_one()
+    product_id = conn.execute(text("""
+        INSERT INTO glum.products (company_id, category_id, product_code, product_name, description, points_value,
+                                   monetary_value, stock_quantity, image_url, status, currency_id)
+        VALUES (:company_id, :category_id, 'BR1', 'Producto caliente', 'benchmark', 1, 1, 1000000000,
+                'http://example.com/p.png', 1, 1) RETURNING id
+    """), {"company_id": COMPANY_ID, "category_id": category_id}).scalar_one()
+    user_ids = conn.execute(text("""
+        INSERT INTO glum.user (username, email, phone_number, first_name, last_name, login_attempts, created_at,
+                               updated_at, role, password_hash, email_verify, user_type, status, must_change_password)
+        SELECT 'bench-redeem-' || n, 'bench-redeem-' || n || '@example.com', (3700000000 + n)::text, 'Bench', 'Redeem',
+               0, now(), now(), 'APP_USER', 'x', 1, 1, 1, false
+        FROM generate_series(1, :users) n RETURNING id
+    """), {"users": users}).scalars().all()
+    conn.execute(text("""
+        INSERT INTO glum.points_balances (user_id, balance, updated_at)
+        SELECT id, 1000000000, now() FROM glum.user WHERE username LIKE 'bench-redeem-%'
+    """))
+    return product_id, user_ids
+
+
+def teardown(conn):
+    users = "(SELECT id FROM glum.user WHERE username LIKE 'bench-redeem-%')"
+    conn.execute(text(f"DELETE FROM glum.points_ledger WHERE user_id IN {users}"))
+    conn.execute(text(f"DELETE FROM glum.points_balances WHERE user_id IN {users}"))
+    conn.execute(text("DELETE FROM glum.user WHERE username LIKE 'bench-redeem-%'"))
+    for table in ("product_redemptions", "products", "categories"):
+        conn.execute(text(f"DELETE FROM glum.{table} WHERE company_id = :c"), {"c": COMPANY_ID})
+
+
+def redeem(session: Session, product_id: int, user_id: int, debit_first: bool, rtt: float):
+    def execute(statement):
+        row = session.execute(statement).first()
+        time.sleep(rtt)
+        return row
+
+    quote = execute(redemption_quote_statement(product_id, 1))
+    debit = lambda: execute(apply_points_statement(user_id, -quote.points, LedgerReason.REDEMPTION, quote.id))
+    stock = lambda: execute(redeem_statement(product_id, user_id, 1, quote.id, quote.points))
+    if debit_first:
+        assert debit() is not None and stock() is not None
+    else:
+        assert stock() is not None and debit() is not None
+    session.commit()
+
+
+def run(engine, product_id: int, user_ids: list[int], debit_first: bool, seconds: float, rtt: float) -> dict:
+    latencies: list[list[float]] = [[] for _ in user_ids]
+    deadline = time.monotonic() + seconds
+
+    def worker(index: int):
+        with Session(engine) as session:
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                redeem(session, product_id, user_ids[index], debit_first, rtt)
+                latencies[index].append((time.perf_counter() - started) * 1000)
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(len(user_ids))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    merged = sorted(latency for per_thread in latencies for latency in per_thread)
+    return {
+        "rate": len(merged) / seconds,
+        "p50": statistics.median(merged),
+        "p99": merged[int(len(merged) * 0.99) - 1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", default="1,8,32")
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--rtt-ms", type=float, default=0)
+    options = parser.parse_args()
+    counts = [int(count) for count in options.threads.split(",")]
+
+    engine = create_engine(settings.database_url, pool_size=max(counts), max_overflow=0)
+    with engine.begin() as conn:
+        product_id, user_ids = setup(conn, max(counts))
+    try:
+        print(f"rtt simulado {options.rtt_ms} ms, {options.seconds}s por caso")
+        print(f"{'orden':14} {'hilos':>5} {'canjes/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+        for threads in counts:
+            for name, debit_first in (("stock-primero", False), ("cargo-primero", True)):
+                result = run(engine, product_id, user_ids[:threads], debit_first, options.seconds, options.rtt_ms / 1000)
+                print(f"{name:14} {threads:5} {result['rate']:9.0f} {result['p50']:8.2f} {result['p99']:8.2f}")
+    finally:
+        with engine.begin() as conn:
+            teardown(conn)
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
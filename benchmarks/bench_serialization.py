@@ -0,0 +1,63 @@
+"""Serialización del resumen del catálogo: camino anterior frente a orjson, sobre filas sintéticas.
+
+- anterior: ProductSummary por fila, validación del response_model (TypeAdapter),
+  jsonable_encoder y json.dumps.
+- json: json.dumps de los dicts de las filas, sin revalidar.
+- orjson: serialize_summary (lo que sirve /products/summary).
+
+No usa la BD: las filas imitan las de summary_statement (tienen `_asdict`).
+
+    python -m benchmarks.bench_serialization [filas] [repeticiones]
+"""
+import json
+import sys
+import time
+from collections import namedtuple
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.models.model_product import ProductSummary
+from app.services.service_product import serialize_summary
+
+SummaryRow = namedtuple("SummaryRow", ["id", "product_name", "category_id", "category_name", "points_value", "image_url"])
+
+
+def build_rows(count: int) -> list:
+    return [
+        SummaryRow(n, f"Producto {n}", n % 50 + 1, f"Categoría {n % 50 + 1}", n % 1000, f"https://img.example.com/{n}.png")
+        for n in range(1, count + 1)
+    ]
+
+
+def main(count: int = 10_000, repeat: int = 20):
+    rows = build_rows(count)
+    adapter = TypeAdapter(List[ProductSummary])
+
+    def before() -> bytes:
+        items = [ProductSummary(**row._asdict()) for row in rows]
+        data = adapter.dump_python(adapter.validate_python(items), mode="json")
+        return json.dumps(jsonable_encoder(data), separators=(",", ":")).encode()
+
+    def stdlib_json() -> bytes:
+        return json.dumps([row._asdict() for row in rows], separators=(",", ":")).encode()
+
+    def with_orjson() -> bytes:
+        return serialize_summary(rows)
+
+    expected = json.loads(before())
+    print(f"{count} filas, {repeat} repeticiones")
+    print(f"{'camino':10} {'ms':>8} {'bytes':>9}")
+    for name, serialize in (("anterior", before), ("json", stdlib_json), ("orjson", with_orjson)):
+        body = serialize()
+        assert json.loads(body) == expected
+        started = time.perf_counter()
+        for _ in range(repeat):
+            serialize()
+        elapsed = (time.perf_counter() - started) / repeat
+        print(f"{name:10} {elapsed * 1000:8.2f} {len(body):9}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,145 @@
+"""Sentencias SQL por escritura: camino anterior (add/get + commit + refresh) frente al actual.
+
+Cuenta con un listener before_cursor_execute las sentencias que cada operación envía a la BD
+(los COMMIT se cuentan aparte). Usa la BD configurada en el entorno (USER_DB, HOST_DB, ...) y
+borra al terminar los datos que crea.
+
+    python -m benchmarks.bench_write_roundtrips [iteraciones]
+"""
+import sys
+import time
+from datetime import datetime
+
+from sqlalchemy import event, text
+from sqlmodel import Session
+
+from app.core.database import engine
+from app.models.model_product import Products, ProductCreate
+from app.models.model_user import User
+from app.services.service_product import update_product_statement
+from app.services.service_user import update_user_statement
+
+COMPANY_ID = 99999
+
+
+class StatementCounter:
+    def __init__(self, bind):
+        self.statements = 0
+        self.commits = 0
+        event.listen(bind, "before_cursor_execute", self._statement)
+        event.listen(bind, "commit", self._commit)
+
+    def _statement(self, *args):
+        self.statements += 1
+
+    def _commit(self, *args):
+        self.commits += 1
+
+    def measure(self, operation, iterations: int) -> tuple[float, float, float]:
+        self.statements = self.commits = 0
+        started = time.perf_counter()
+        for index in range(iterations):
+            operation(index)
+        elapsed = time.perf_counter() - started
+        return self.statements / iterations, self.commits / iterations, elapsed / iterations * 1000
+
+
+def setup() -> tuple[int, int]:
+    with engine.begin() as conn:
+        category_id = conn.execute(text("""
+            INSERT INTO glum.categories (company_id, category_name, description, status, created_at, updated_at)
+            VALUES (:company_id, 'Benchmark', 'benchmark', 1, now(), now()) RETURNING id
+        """), {"company_id": COMPANY_ID}).scalar_one()
+        user_id = conn.execute(text("""
+            INSERT INTO glum.user (username, email, phone_number, first_name, last_name, login_attempts, created_at, updated_at,
+                                   role, password_hash, email_verify, user_type, status, must_change_password)
+            VALUES ('bench-writes', 'bench-writes@example.com', '3888888888', 'Bench', 'Writes', 0, now(), now(),
+                    'APP_USER', 'x', 1, 1, 1, false) RETURNING id
+        """)).scalar_one()
+    return category_id, user_id
+
+
+def teardown(user_id: int):
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM glum.products WHERE company_id = :c"), {"c": COMPANY_ID})
+        conn.execute(text("DELETE FROM glum.categories WHERE company_id = :c"), {"c": COMPANY_ID})
+        conn.execute(text("DELETE FROM glum.user WHERE id = :id"), {"id": user_id})
+
+
+def main(iterations: int = 200):
+    category_id, user_id = setup()
+    counter = StatementCounter(engine)
+
+    def product(index: int) -> Products:
+        return Products(**ProductCreate(
+            company_id=COMPANY_ID, category_id=category_id, product_code=f"BW{index}", product_name=f"Producto {index}",
+            description="benchmark", points_value=10, monetary_value=1.5, stock_quantity=100,
+            image_url="http://example.com/p.png",
+        ).dict())
+
+    def create_before(index: int):
+        with Session(engine) as session:
+            db_product = product(index)
+            session.add(db_product)
+            session.commit()
+            session.refresh(db_product)
+
+    def create_after(index: int):
+        with Session(engine, expire_on_commit=False) as session:
+            session.add(product(iterations + index))
+            session.commit()
+
+    # Producto sobre el que se miden las actualizaciones (el primero que se crea)
+    target = {}
+
+    def update_product_before(index: int):
+        with Session(engine) as session:
+            db_product = session.get(Products, target["product_id"])
+            db_product.points_value = index
+            db_product.updated_at = datetime.utcnow()
+            session.add(db_product)
+            session.commit()
+            session.refresh(db_product)
+
+    def update_product_after(index: int):
+        with Session(engine, expire_on_commit=False) as session:
+            session.execute(update_product_statement(target["product_id"], {"points_value": index})).scalar_one()
+            session.commit()
+
+    def update_user_before(index: int):
+        with Session(engine) as session:
+            db_user = session.get(User, user_id)
+            db_user.first_name = f"Bench {index}"
+            db_user.updated_at = datetime.utcnow()
+            session.add(db_user)
+            session.commit()
+            session.refresh(db_user)
+
+    def update_user_after(index: int):
+        with Session(engine, expire_on_commit=False) as session:
+            session.execute(update_user_statement(user_id, {"first_name": f"Bench {index}"})).scalar_one()
+            session.commit()
+
+    try:
+        results = [("crear producto (add + commit + refresh)", create_before),
+                   ("crear producto (INSERT ... RETURNING)", create_after)]
+        rows = [(name, *counter.measure(operation, iterations)) for name, operation in results]
+        with engine.connect() as conn:
+            target["product_id"] = (conn.execute(text("SELECT min(id) FROM glum.products WHERE company_id = :c"), {"c": COMPANY_ID}).scalar_one())
+        for name, operation in [
+            ("actualizar producto (get + commit + refresh)", update_product_before),
+            ("actualizar producto (UPDATE ... RETURNING)", update_product_after),
+            ("actualizar usuario (get + commit + refresh)", update_user_before),
+            ("actualizar usuario (UPDATE ... RETURNING)", update_user_after),
+        ]:
+            rows.append((name, *counter.measure(operation, iterations)))
+    finally:
+        teardown(user_id)
+
+    print(f"{'operación':48} {'sentencias':>10} {'commits':>8} {'ms/op':>8}")
+    for name, statements, commits, ms in rows:
+        print(f"{name:48} {statements:10.1f} {commits:8.1f} {ms:8.2f}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
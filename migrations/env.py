@@ -0,0 +1,62 @@
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import text
+from sqlmodel import SQLModel
+
+from app.core.config import settings
+from app.core.database import engine
+import app.models  # noqa: F401  Registra las tablas en SQLModel.metadata
+import app.models.model_user  # noqa: F401
+import app.models.model_email_outbox  # noqa: F401
+import app.models.model_wallet  # noqa: F401
+import app.models.model_revoked_token  # noqa: F401
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = SQLModel.metadata
+
+# Todas las tablas viven en el esquema glum, incluida la tabla de versiones de Alembic
+SCHEMA = "glum"
+
+
+def include_name(name, type_, parent_names):
+    if type_ == "schema":
+        return name == SCHEMA
+    return True
+
+
+def run_migrations_offline():
+    context.configure(
+        url=settings.database_url,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        include_schemas=True,
+        include_name=include_name,
+        version_table_schema=SCHEMA,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    with engine.connect() as connection:
+        connection.execute(text(f"CREATE SCHEMA IF NOT EXISTS {SCHEMA}"))
+        connection.commit()
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_schemas=True,
+            include_name=include_name,
+            version_table_schema=SCHEMA,
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,81 @@
+"""Esquema inicial (user, categories, products)
+
+Corresponde a las tablas que creaba create_all antes de las migraciones. En una BD
+existente creada así se marca con `python -m app.manage stamp 0001` en lugar de ejecutarla.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 06:59:51.914365
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('categories',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=False),
+    sa.Column('category_name', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=False),
+    sa.Column('description', sqlmodel.sql.sqltypes.AutoString(length=250), nullable=False),
+    sa.Column('status', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    schema='glum'
+    )
+    op.create_table('user',
+    sa.Column('username', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=False),
+    sa.Column('email', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('phone_number', sqlmodel.sql.sqltypes.AutoString(length=20), nullable=False),
+    sa.Column('first_name', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=False),
+    sa.Column('last_name', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=False),
+    sa.Column('login_attempts', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('role', sa.Enum('APP_USER', 'SYSTEM_USER', 'APP_CLIENT', name='userrole'), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('password_hash', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('email_verify', sa.Integer(), nullable=True),
+    sa.Column('user_type', sa.Integer(), nullable=True),
+    sa.Column('status', sa.Integer(), nullable=True),
+    sa.Column('must_change_password', sa.Boolean(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    schema='glum'
+    )
+    op.create_index('ix_glum_user_email', 'user', ['email'], unique=False, schema='glum')
+    op.create_table('products',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('product_code', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('product_name', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=False),
+    sa.Column('description', sqlmodel.sql.sqltypes.AutoString(length=250), nullable=False),
+    sa.Column('points_value', sa.Integer(), nullable=False),
+    sa.Column('monetary_value', sa.Float(), nullable=False),
+    sa.Column('stock_quantity', sa.Integer(), nullable=False),
+    sa.Column('image_url', sqlmodel.sql.sqltypes.AutoString(length=512), nullable=False),
+    sa.Column('status', sa.Integer(), nullable=False),
+    sa.Column('currency_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['category_id'], ['glum.categories.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    schema='glum'
+    )
+    op.create_index('ix_glum_products_product_code', 'products', ['product_code'], unique=False, schema='glum')
+
+
+def downgrade():
+    op.drop_index('ix_glum_products_product_code', table_name='products', schema='glum')
+    op.drop_table('products', schema='glum')
+    op.drop_index('ix_glum_user_email', table_name='user', schema='glum')
+    op.drop_table('user', schema='glum')
+    op.drop_table('categories', schema='glum')
+    sa.Enum(name='userrole').drop(op.get_bind(), checkfirst=True)
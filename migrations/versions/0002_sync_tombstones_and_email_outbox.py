@@ -0,0 +1,51 @@
+"""Sincronización incremental de productos y outbox de correos
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 07:02:10.412230
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_products_company_id_updated_at', 'products', ['company_id', 'updated_at'], unique=False, schema='glum')
+    op.create_table('product_tombstones',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    schema='glum'
+    )
+    op.create_index('ix_product_tombstones_company_id_deleted_at', 'product_tombstones', ['company_id', 'deleted_at'], unique=False, schema='glum')
+    op.create_table('email_outbox',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('recipient', sqlmodel.sql.sqltypes.AutoString(length=320), nullable=False),
+    sa.Column('subject', sqlmodel.sql.sqltypes.AutoString(length=250), nullable=False),
+    sa.Column('body', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('status', sa.Integer(), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+    sa.Column('last_error', sqlmodel.sql.sqltypes.AutoString(length=500), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('sent_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    schema='glum'
+    )
+    op.create_index('ix_email_outbox_status_next_attempt_at', 'email_outbox', ['status', 'next_attempt_at'], unique=False, schema='glum')
+
+
+def downgrade():
+    op.drop_index('ix_email_outbox_status_next_attempt_at', table_name='email_outbox', schema='glum')
+    op.drop_table('email_outbox', schema='glum')
+    op.drop_index('ix_product_tombstones_company_id_deleted_at', table_name='product_tombstones', schema='glum')
+    op.drop_table('product_tombstones', schema='glum')
+    op.drop_index('ix_products_company_id_updated_at', table_name='products', schema='glum')
@@ -0,0 +1,36 @@
+"""Índices de las búsquedas de autenticación, usuarios y catálogo
+
+Los índices de user son únicos: si hay username, email o teléfono duplicados la
+migración falla y hay que depurarlos antes de aplicarla.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 07:02:13.782229
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_categories_company_id_status', 'categories', ['company_id', 'status'], unique=False, schema='glum')
+    op.create_index('ix_products_company_id_category_id', 'products', ['company_id', 'category_id'], unique=False, schema='glum')
+    op.drop_index('ix_glum_user_email', table_name='user', schema='glum')
+    op.create_index('ix_glum_user_email', 'user', ['email'], unique=True, schema='glum')
+    op.create_index('ix_glum_user_phone_number', 'user', ['phone_number'], unique=True, schema='glum')
+    op.create_index('ix_glum_user_username', 'user', ['username'], unique=True, schema='glum')
+
+
+def downgrade():
+    op.drop_index('ix_glum_user_username', table_name='user', schema='glum')
+    op.drop_index('ix_glum_user_phone_number', table_name='user', schema='glum')
+    op.drop_index('ix_glum_user_email', table_name='user', schema='glum')
+    op.create_index('ix_glum_user_email', 'user', ['email'], unique=False, schema='glum')
+    op.drop_index('ix_products_company_id_category_id', table_name='products', schema='glum')
+    op.drop_index('ix_categories_company_id_status', table_name='categories', schema='glum')
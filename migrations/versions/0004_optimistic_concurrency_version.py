@@ -0,0 +1,25 @@
+"""Columna version para concurrencia optimista en products y user (If-Match)
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 07:05:37.422868
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('products', sa.Column('version', sa.Integer(), server_default=sa.text('1'), nullable=False), schema='glum')
+    op.add_column('user', sa.Column('version', sa.Integer(), server_default=sa.text('1'), nullable=False), schema='glum')
+
+
+def downgrade():
+    op.drop_column('user', 'version', schema='glum')
+    op.drop_column('products', 'version', schema='glum')
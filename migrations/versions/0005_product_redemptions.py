@@ -0,0 +1,37 @@
+"""Registro de canjes de productos por puntos
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 07:06:44.345290
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('product_redemptions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('points', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    schema='glum'
+    )
+    op.create_index('ix_glum_product_redemptions_product_id', 'product_redemptions', ['product_id'], unique=False, schema='glum')
+    op.create_index('ix_product_redemptions_user_id_created_at', 'product_redemptions', ['user_id', 'created_at'], unique=False, schema='glum')
+
+
+def downgrade():
+    op.drop_index('ix_product_redemptions_user_id_created_at', table_name='product_redemptions', schema='glum')
+    op.drop_index('ix_glum_product_redemptions_product_id', table_name='product_redemptions', schema='glum')
+    op.drop_table('product_redemptions', schema='glum')
@@ -0,0 +1,46 @@
+"""Monedero de puntos: ledger de movimientos y saldo materializado
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 07:08:24.853873
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('points_balances',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('balance', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.CheckConstraint('balance >= 0', name='ck_points_balances_balance_non_negative'),
+    sa.ForeignKeyConstraint(['user_id'], ['glum.user.id'], ),
+    sa.PrimaryKeyConstraint('user_id'),
+    schema='glum'
+    )
+    op.create_table('points_ledger',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('amount', sa.Integer(), nullable=False),
+    sa.Column('balance_after', sa.Integer(), nullable=False),
+    sa.Column('reason', sqlmodel.sql.sqltypes.AutoString(length=20), nullable=False),
+    sa.Column('reference_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['glum.user.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    schema='glum'
+    )
+    op.create_index('ix_points_ledger_user_id_id', 'points_ledger', ['user_id', 'id'], unique=False, schema='glum')
+
+
+def downgrade():
+    op.drop_index('ix_points_ledger_user_id_id', table_name='points_ledger', schema='glum')
+    op.drop_table('points_ledger', schema='glum')
+    op.drop_table('points_balances', schema='glum')
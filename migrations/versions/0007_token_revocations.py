@@ -0,0 +1,35 @@
+"""Revocaciones de tokens (logout y cambio de contraseña)
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 07:14:04.678022
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('revoked_tokens',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('jti', sqlmodel.sql.sqltypes.AutoString(length=64), nullable=True),
+    sa.Column('username', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=True),
+    sa.Column('revoked_at', sa.DateTime(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    schema='glum'
+    )
+    op.create_index('ix_glum_revoked_tokens_jti', 'revoked_tokens', ['jti'], unique=True, schema='glum')
+    op.create_index('ix_revoked_tokens_expires_at', 'revoked_tokens', ['expires_at'], unique=False, schema='glum')
+
+
+def downgrade():
+    op.drop_index('ix_revoked_tokens_expires_at', table_name='revoked_tokens', schema='glum')
+    op.drop_index('ix_glum_revoked_tokens_jti', table_name='revoked_tokens', schema='glum')
+    op.drop_table('revoked_tokens', schema='glum')
@@ -0,0 +1,29 @@
+"""Fechas de productos y bajas tomadas del reloj de la BD
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 07:31:43.776899
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+DB_UTC_NOW = sa.text("timezone('utc', clock_timestamp())")
+
+
+def upgrade():
+    op.alter_column('products', 'created_at', server_default=DB_UTC_NOW, schema='glum')
+    op.alter_column('products', 'updated_at', server_default=DB_UTC_NOW, schema='glum')
+    op.alter_column('product_tombstones', 'deleted_at', server_default=DB_UTC_NOW, schema='glum')
+
+
+def downgrade():
+    op.alter_column('product_tombstones', 'deleted_at', server_default=None, schema='glum')
+    op.alter_column('products', 'updated_at', server_default=None, schema='glum')
+    op.alter_column('products', 'created_at', server_default=None, schema='glum')
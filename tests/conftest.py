@@ -0,0 +1,96 @@
+import os
+from urllib.parse import urlsplit
+
+import pytest
+
+# Las pruebas que necesitan Postgres usan TEST_DATABASE_URL (p. ej. postgresql://postgres:pw@localhost:5432/glum_test)
+# y se omiten sin ella. La configuración de la app se lee del entorno al importarla, por eso se fija aquí.
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+if TEST_DATABASE_URL:
+    _url = urlsplit(TEST_DATABASE_URL)
+    os.environ.update(
+        USER_DB=_url.username or "", PASSWORD_DB=_url.password or "", HOST_DB=_url.hostname or "",
+        PORT_DB=str(_url.port or 5432), NAME_DB=_url.path.lstrip("/"),
+    )
+else:
+    for _name, _value in dict(USER_DB="postgres", PASSWORD_DB="", HOST_DB="localhost", PORT_DB="5432", NAME_DB="glum_test").items():
+        os.environ.setdefault(_name, _value)
+os.environ.setdefault("TOKEN_GLUM", "test-secret")
+os.environ.setdefault("ALGORITM", "HS256")
+os.environ.setdefault("TIME_EXP_WSGLUM", "30")
+os.environ.update(OUTBOX_ENABLED="false", WALLET_RECONCILE_SECONDS="0", DB_AUTO_CREATE="false", CATALOG_CACHE_BACKEND="local")
+
+ADMIN_PASSWORD = "admin-password"
+
+
+@pytest.fixture(scope="session")
+def database():
+    """BD de pruebas migrada hasta head"""
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL no está definida")
+    from alembic import command
+    from app.core.database import engine
+    from app.core.migrations import alembic_config
+
+    command.upgrade(alembic_config(), "head")
+    return engine
+
+
+@pytest.fixture(scope="session")
+def client(database):
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(scope="session")
+def admin_headers(client, database):
+    from sqlalchemy import text
+    from app.core.auth import hash_password
+
+    with database.begin() as connection:
+        connection.execute(text("""
+            INSERT INTO glum.user (username, email, phone_number, first_name, last_name, login_attempts, created_at, updated_at,
+                                   role, password_hash, email_verify, user_type, status, must_change_password)
+            VALUES ('test-admin', 'test-admin@example.com', '3999999999', 'Test', 'Admin', 0, now(), now(),
+                    'SYSTEM_USER', :password_hash, 1, 8, 1, false)
+            ON CONFLICT DO NOTHING
+        """), {"password_hash": hash_password(ADMIN_PASSWORD)})
+    response = client.post("/auth/login", json={"username": "test-admin", "password": ADMIN_PASSWORD, "rol": "SYSTEM_USER"})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def company(database):
+    """Compañía de pruebas con una categoría; sus productos se borran al terminar"""
+    from sqlalchemy import text
+
+    company_id = 9000 + os.getpid() % 1000
+    with database.begin() as connection:
+        category_id = connection.execute(text("""
+            INSERT INTO glum.categories (company_id, category_name, description, status, created_at, updated_at)
+            VALUES (:company_id, 'Pruebas', 'categoría de pruebas', 1, now(), now()) RETURNING id
+        """), {"company_id": company_id}).scalar_one()
+    yield {"company_id": company_id, "category_id": category_id}
+    with database.begin() as connection:
+        connection.execute(text("DELETE FROM glum.product_redemptions WHERE company_id = :c"), {"c": company_id})
+        connection.execute(text("DELETE FROM glum.products WHERE company_id = :c"), {"c": company_id})
+        connection.execute(text("DELETE FROM glum.product_tombstones WHERE company_id = :c"), {"c": company_id})
+        connection.execute(text("DELETE FROM glum.categories WHERE company_id = :c"), {"c": company_id})
+
+
+@pytest.fixture
+def product_data(company):
+    """Construye el cuerpo de un producto válido de la compañía de pruebas"""
+    def build(code: str, **overrides) -> dict:
+        data = dict(
+            company_id=company["company_id"], category_id=company["category_id"], product_code=code,
+            product_name=f"Producto {code}", description="producto de pruebas", points_value=10,
+            monetary_value=1.5, stock_quantity=100, image_url="http://example.com/p.png",
+        )
+        data.update(overrides)
+        return data
+    return build
@@ -0,0 +1,59 @@
+import time
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.auth import create_access_token, create_refresh_token
+from app.core.config import settings
+from app.core.keys import key_ring
+from app.core.revocation import TOKEN_MAX_LIFETIME, SubjectRevocations
+from app.core.validate_token import get_current_user
+
+CLAIMS = {"sub": "token-user", "uid": 1, "role": "APP_USER", "status": 1}
+
+
+def _status(token: str) -> int:
+    with pytest.raises(HTTPException) as error:
+        get_current_user(token)
+    return error.value.status_code
+
+
+def test_access_token_is_accepted():
+    principal = get_current_user(create_access_token(CLAIMS))
+    assert principal.username == "token-user" and principal.id == 1
+
+
+def test_tokens_without_type_or_expiry_are_rejected():
+    now = int(time.time())
+    assert _status(key_ring.sign({"sub": "token-user"})) == 401
+    assert _status(key_ring.sign({**CLAIMS, "iat": now, "exp": now + 60})) == 401
+    assert _status(key_ring.sign({**CLAIMS, "iat": now, "jti": "a" * 32, "typ": "access"})) == 401
+    assert _status(create_refresh_token(CLAIMS)) == 401
+
+
+def test_subject_revocation_outlives_refresh_tokens():
+    assert TOKEN_MAX_LIFETIME >= settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400
+    revocations = SubjectRevocations(ttl=TOKEN_MAX_LIFETIME)
+    # Revocación de hace un día: un refresh token emitido antes sigue siendo inválido
+    revoked_at = time.time() - 86400
+    revocations.revoke("token-user", at=revoked_at)
+    revocations.revoke("otro", at=time.time())
+    assert revocations.is_revoked("token-user", revoked_at - 3600)
+    assert not revocations.is_revoked("token-user", revoked_at + 1)
+
+
+def test_logout_with_expired_access_token_revokes_refresh_token(client, admin_headers):
+    payload = key_ring.decode(admin_headers["Authorization"].removeprefix("Bearer "))
+    expired = create_access_token({name: payload[name] for name in CLAIMS}, expires_delta=timedelta(seconds=-10))
+    refresh_token = create_refresh_token({"sub": payload["sub"], "uid": payload["uid"]})
+    assert _status(expired) == 401
+    assert client.post("/auth/refresh", json={"refresh_token": refresh_token}).status_code == 200
+
+    response = client.post("/auth/logout", json={"refresh_token": refresh_token}, headers={"Authorization": f"Bearer {expired}"})
+    assert response.status_code == 204, response.text
+    assert client.post("/auth/refresh", json={"refresh_token": refresh_token}).status_code == 401
+
+    # La firma se sigue comprobando
+    forged = expired[:-4] + ("AAAA" if not expired.endswith("AAAA") else "BBBB")
+    assert client.post("/auth/logout", headers={"Authorization": f"Bearer {forged}"}).status_code == 401
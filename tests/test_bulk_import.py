@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.services.service_product import _parse_rows
+
+PRODUCTS = "/products/products"
+
+
+async def _chunks(body: bytes, size: int):
+    for start in range(0, len(body), size):
+        yield body[start:start + size]
+
+
+def _rows(body: bytes, fmt: str, size: int = 7) -> list:
+    async def collect():
+        return [row async for row in _parse_rows(_chunks(body, size), fmt)]
+    return asyncio.run(collect())
+
+
+def test_csv_quoted_field_spans_lines():
+    body = b'product_code,description\r\nA1,"primera\nsegunda"\r\nA2,"con ""comillas"""\n'
+    assert _rows(body, "csv") == [
+        (1, {"product_code": "A1", "description": "primera\nsegunda"}, None),
+        (2, {"product_code": "A2", "description": 'con "comillas"'}, None),
+    ]
+
+
+def test_csv_unclosed_quote_is_a_row_error():
+    rows = _rows(b'product_code,description\nA1,"sin cerrar\n', "csv")
+    assert rows == [(1, None, "Fila mal formada: comillas sin cerrar")]
+
+
+def test_invalid_utf8_is_a_row_error():
+    rows = _rows(b'product_code,description\nA1,\xff\xfe\nA2,ok\n', "csv")
+    assert rows[0][0] == 1 and rows[0][1] is None and rows[0][2].startswith("Fila mal formada")
+    assert rows[1] == (2, {"product_code": "A2", "description": "ok"}, None)
+
+    rows = _rows(b'{"product_code": "\xff"}\n{"product_code": "A3"}\n', "ndjson")
+    assert rows[0][1] is None and rows[1] == (2, {"product_code": "A3"}, None)
+
+
+def test_invalid_utf8_header_is_rejected():
+    with pytest.raises(HTTPException) as error:
+        _rows(b'product_code,\xff\nA1,x\n', "csv")
+    assert error.value.status_code == 400
+
+
+def test_bulk_csv_with_multiline_description(client, admin_headers, company, product_data):
+    fields = ["company_id", "category_id", "product_code", "product_name", "description",
+              "points_value", "monetary_value", "stock_quantity", "image_url"]
+    data = product_data("B1", description="línea uno\nlínea dos")
+    body = ",".join(fields) + "\n" + ",".join(f'"{data[name]}"' for name in fields) + "\n"
+
+    response = client.post(f"{PRODUCTS}/bulk", params={"format": "csv"}, content=body.encode(), headers=admin_headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["inserted"] == 1
+
+    response = client.post(f"{PRODUCTS}/bulk", params={"format": "csv"}, content=b"product_code\n\xff\n", headers=admin_headers)
+    assert response.status_code == 422
+    assert response.json()["errors"][0]["row"] == 1
+
+
+def test_oversized_lines_are_row_errors(monkeypatch):
+    monkeypatch.setattr(settings, "BULK_MAX_LINE_BYTES", 32)
+    long_line = b'{"product_code": "' + b"x" * 100 + b'"}'
+    body = b'{"product_code": "A1"}\n' + long_line + b'\n{"product_code": "A2"}\n' + long_line
+    rows = _rows(body, "ndjson", size=5)
+    assert rows == _rows(body, "ndjson", size=len(body))
+    assert [row[0] for row in rows] == [1, 2, 3, 4]
+    assert rows[0][1] == {"product_code": "A1"} and rows[2][1] == {"product_code": "A2"}
+    assert rows[1][2].startswith("Fila mal formada: supera") and rows[3][2] == rows[1][2]
+
+    # Un registro CSV con comillas sin cerrar tampoco acumula más del máximo
+    body = b'product_code,description\nA1,"abierta\n' + b"y" * 20 + b"\n" + b"z" * 20 + b'\nA2,ok\n'
+    rows = _rows(body, "csv")
+    assert rows[0][1] is None and rows[0][2].startswith("Fila mal formada: supera")
+    assert rows[-1] == (len(rows), {"product_code": "A2", "description": "ok"}, None)
+
+    with pytest.raises(HTTPException) as error:
+        _rows(b"c" * 100 + b"\nA1\n", "csv")
+    assert error.value.status_code == 413
@@ -0,0 +1,90 @@
+import time
+
+from app.core.cache import LocalCacheBackend, TTLCache
+
+PRODUCTS = "/products/products"
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" pasa a ser la menos usada
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats() == {"size": 2, "maxsize": 2, "hits": 3, "misses": 1}
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache(maxsize=10, ttl=0.05)
+    cache.set("a", 1)
+    time.sleep(0.06)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_local_backend_get_set_delete():
+    backend = LocalCacheBackend(maxsize=10, ttl=60)
+    assert backend.get("1") is None
+    backend.set("1", b"body")
+    assert backend.get("1") == b"body"
+    backend.delete("1")
+    assert backend.get("1") is None
+    assert backend.stats()["hits"] == 1 and backend.stats()["misses"] == 2
+
+
+def test_summary_is_cached_and_invalidated_by_writes(client, admin_headers, company, product_data):
+    params = {"company_id": company["company_id"]}
+    client.post(f"{PRODUCTS}/create", json=product_data("C1"), headers=admin_headers)
+    first = client.get(f"{PRODUCTS}/summary", params=params, headers=admin_headers)
+    assert [item["product_name"] for item in first.json()] == ["Producto C1"]
+
+    cached = client.get(f"{PRODUCTS}/summary", params=params, headers={**admin_headers, "If-None-Match": first.headers["etag"]})
+    assert cached.status_code == 304
+
+    client.post(f"{PRODUCTS}/create", json=product_data("C2"), headers=admin_headers)
+    second = client.get(f"{PRODUCTS}/summary", params=params, headers=admin_headers)
+    assert sorted(item["product_name"] for item in second.json()) == ["Producto C1", "Producto C2"]
+    assert second.headers["etag"] != first.headers["etag"]
+
+
+def test_invalidation_during_a_miss_is_not_lost(client, admin_headers, company, product_data, monkeypatch):
+    """Un cambio confirmado entre la lectura y el set no deja en cache el resumen anterior"""
+    from app.api.v1.endpoints import ep_products
+    from app.services import service_product
+
+    params = {"company_id": company["company_id"]}
+    client.post(f"{PRODUCTS}/create", json=product_data("R1"), headers=admin_headers)
+    service_product.invalidate_catalog(company["company_id"])
+
+    original_set = ep_products.set_cached_summary
+
+    def set_after_concurrent_write(company_id, etag, body):
+        monkeypatch.setattr(ep_products, "set_cached_summary", original_set)
+        # Escritura concurrente: se confirma (e invalida) antes de que la petición guarde lo que leyó
+        client.post(f"{PRODUCTS}/create", json=product_data("R2"), headers=admin_headers)
+        original_set(company_id, etag, body)
+
+    monkeypatch.setattr(ep_products, "set_cached_summary", set_after_concurrent_write)
+    stale = client.get(f"{PRODUCTS}/summary", params=params, headers=admin_headers)
+    assert [item["product_name"] for item in stale.json()] == ["Producto R1"]
+
+    assert service_product.get_cached_summary(company["company_id"]) is None
+    fresh = client.get(f"{PRODUCTS}/summary", params=params, headers=admin_headers)
+    assert sorted(item["product_name"] for item in fresh.json()) == ["Producto R1", "Producto R2"]
+
+
+def test_summary_cache_is_filled_from_the_primary(client, admin_headers, company, product_data, monkeypatch):
+    """Una réplica atrasada no debe dejar en caché un cuerpo/ETag viejo"""
+    from app.core import database
+
+    chosen = []
+    monkeypatch.setattr(database.replicas, "choose", lambda: chosen.append(True))
+    params = {"company_id": company["company_id"]}
+    client.post(f"{PRODUCTS}/create", json=product_data("C4"), headers=admin_headers)
+
+    assert client.get(f"{PRODUCTS}/summary", params=params, headers=admin_headers).status_code == 200
+    assert chosen == []
+    client.get(f"{PRODUCTS}/changes", params={**params, "since": "2000-01-01T00:00:00"}, headers=admin_headers)
+    assert chosen == [True]
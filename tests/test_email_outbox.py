@@ -0,0 +1,125 @@
+import socket
+from datetime import datetime, timedelta
+from email import message_from_string
+
+import pytest
+from sqlalchemy import delete
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.models.model_email_outbox import EmailOutbox, OutboxStatus
+from app.services.service_email import OutboxDispatcher, SMTPConnection
+
+aiosmtpd_controller = pytest.importorskip("aiosmtpd.controller")
+
+REFUSED = "rechazado@example.com"
+
+
+class _Handler:
+    """Servidor SMTP de pruebas: guarda los mensajes y rechaza un destinatario con 550"""
+
+    def __init__(self):
+        self.messages = []
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address == REFUSED:
+            return "550 buzón inexistente"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(message_from_string(envelope.content.decode()))
+        return "250 OK"
+
+
+@pytest.fixture
+def smtp_server():
+    # El Controller necesita un puerto concreto: se pide uno libre al sistema
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    handler = _Handler()
+    controller = aiosmtpd_controller.Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+    yield handler, port
+    controller.stop()
+
+
+@pytest.fixture
+def dispatcher(smtp_server, database, monkeypatch):
+    _, port = smtp_server
+    monkeypatch.setattr(settings, "USER_EMAIL_NOTIFICATIONS", "noreply@example.com")
+    dispatcher = OutboxDispatcher()
+    dispatcher.connection = SMTPConnection("127.0.0.1", port, None, None, use_tls=False)
+    yield dispatcher
+    dispatcher.connection.close()
+
+
+@pytest.fixture
+def outbox(database):
+    """Inserta correos en el outbox y los borra al terminar"""
+    ids = []
+
+    def add(recipient: str, **values) -> int:
+        with Session(database) as session:
+            item = EmailOutbox(recipient=recipient, subject="Prueba", body="cuerpo", **values)
+            session.add(item)
+            session.commit()
+            ids.append(item.id)
+            return item.id
+
+    yield add
+    with Session(database) as session:
+        session.execute(delete(EmailOutbox).where(EmailOutbox.id.in_(ids)))
+        session.commit()
+
+
+def _rows(database, ids) -> dict:
+    with Session(database) as session:
+        return {item.id: item for item in session.exec(select(EmailOutbox).where(EmailOutbox.id.in_(ids)))}
+
+
+def test_dispatch_marks_each_row(dispatcher, smtp_server, outbox, database):
+    handler, _ = smtp_server
+    sent = outbox("cliente@example.com")
+    refused = outbox(REFUSED)
+
+    dispatcher.dispatch_batch()
+
+    rows = _rows(database, [sent, refused])
+    assert rows[sent].status == OutboxStatus.SENT and rows[sent].attempts == 1
+    # El destinatario rechazado es permanente: no se reintenta
+    assert rows[refused].status == OutboxStatus.FAILED and "550" in rows[refused].last_error
+    assert [message["To"] for message in handler.messages] == ["cliente@example.com"]
+
+
+def test_lease_controls_reclaiming(dispatcher, smtp_server, outbox, database):
+    handler, _ = smtp_server
+    leased = outbox("ocupado@example.com", status=OutboxStatus.SENDING, attempts=1,
+                    next_attempt_at=datetime.utcnow() + timedelta(minutes=5))
+    expired = outbox("abandonado@example.com", status=OutboxStatus.SENDING, attempts=1,
+                     next_attempt_at=datetime.utcnow() - timedelta(seconds=1))
+
+    dispatcher.dispatch_batch()
+
+    rows = _rows(database, [leased, expired])
+    assert rows[leased].status == OutboxStatus.SENDING and rows[leased].attempts == 1
+    assert rows[expired].status == OutboxStatus.SENT and rows[expired].attempts == 2
+    assert [message["To"] for message in handler.messages] == ["abandonado@example.com"]
+
+
+def test_claimed_rows_are_committed_before_sending(dispatcher, smtp_server, outbox, database):
+    """Durante el envío no hay transacción abierta: el lote ya figura como SENDING para otros workers"""
+    item = outbox("cliente@example.com")
+    seen = []
+
+    def send(sender, recipient, message):
+        seen.append(_rows(database, [item])[item].status)
+        raise ConnectionRefusedError("servidor caído")
+
+    dispatcher.connection.send = send
+    dispatcher.dispatch_batch()
+
+    assert seen == [OutboxStatus.SENDING]
+    row = _rows(database, [item])[item]
+    assert row.status == OutboxStatus.PENDING and row.next_attempt_at > datetime.utcnow()
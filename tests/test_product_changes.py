@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta
+
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.services.service_product import update_product_statement
+
+PRODUCTS = "/products/products"
+
+
+def _changes(client, headers, company_id, since):
+    response = client.get(f"{PRODUCTS}/changes", params={"company_id": company_id, "since": since}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_changes_report_upserts_and_deletes(client, admin_headers, company, product_data):
+    created = client.post(f"{PRODUCTS}/create", json=product_data("S1"), headers=admin_headers).json()
+    deleted = client.post(f"{PRODUCTS}/create", json=product_data("S2"), headers=admin_headers).json()
+    client.delete(f"{PRODUCTS}/delete/{deleted['id']}", headers=admin_headers)
+
+    changes = _changes(client, admin_headers, company["company_id"], "2000-01-01T00:00:00")
+    assert changes["upserted"] == [created["id"]]
+    assert changes["deleted"] == [deleted["id"]]
+
+
+def test_watermark_stays_behind_uncommitted_changes(client, admin_headers, company, product_data, database):
+    """Un cambio fechado antes de la lectura pero confirmado después aparece en la siguiente consulta"""
+    product = client.post(f"{PRODUCTS}/create", json=product_data("S3"), headers=admin_headers).json()
+    since = (datetime.utcnow() - timedelta(hours=1)).isoformat()
+
+    with Session(database) as writer:
+        # La transacción fecha el cambio y tarda en confirmarse
+        writer.execute(update_product_statement(product["id"], {"points_value": 99}))
+        first = _changes(client, admin_headers, company["company_id"], since)
+        writer.commit()
+
+    watermark = datetime.fromisoformat(first["watermark"])
+    assert watermark <= datetime.utcnow() - timedelta(seconds=settings.CHANGES_SAFETY_LAG_SECONDS) + timedelta(seconds=1)
+    second = _changes(client, admin_headers, company["company_id"], first["watermark"])
+    assert product["id"] in second["upserted"]
@@ -0,0 +1,54 @@
+import pytest
+from sqlalchemy import text
+
+from app.manage import HOT_QUERIES, explain_hot_queries
+
+# Volumen suficiente para que el planificador, con estadísticas reales, prefiera los índices
+COMPANIES = 1000
+CATEGORIES_PER_COMPANY = 10
+PRODUCTS = 50000
+USERS = 20000
+ANALYZE = "ANALYZE glum.categories, glum.products, glum.user"
+
+
+@pytest.fixture
+def seeded(database):
+    """Datos sintéticos en una transacción que se revierte.
+
+    El ANALYZE actualiza pg_class.reltuples/relpages en el sitio y eso no se revierte: al terminar
+    se analiza de nuevo para que la BD compartida no se quede con estimaciones de filas que no existen.
+    """
+    with database.connect() as conn:
+        transaction = conn.begin()
+        conn.execute(text("""
+            INSERT INTO glum.categories (company_id, category_name, description, status, created_at, updated_at)
+            SELECT c, 'Categoría ' || c || '-' || k, 'plan', 1, now(), now()
+            FROM generate_series(1, :companies) c, generate_series(1, :per_company) k
+        """), {"companies": COMPANIES, "per_company": CATEGORIES_PER_COMPANY})
+        conn.execute(text("""
+            INSERT INTO glum.products (company_id, category_id, product_code, product_name, description, points_value,
+                                       monetary_value, stock_quantity, image_url, status, currency_id)
+            SELECT cat.company_id, cat.id, 'P' || n, 'Producto ' || n, 'plan', n % 500, 1, 100, 'http://example.com/p.png', 1, 1
+            FROM generate_series(1, :products) n
+            JOIN glum.categories cat ON cat.company_id = n % :companies + 1 AND cat.description = 'plan'
+                                    AND cat.category_name = 'Categoría ' || (n % :companies + 1) || '-' || (n % :per_company + 1)
+        """), {"products": PRODUCTS, "companies": COMPANIES, "per_company": CATEGORIES_PER_COMPANY})
+        conn.execute(text("""
+            INSERT INTO glum.user (username, email, phone_number, first_name, last_name, login_attempts, created_at,
+                                   updated_at, role, password_hash, email_verify, user_type, status, must_change_password)
+            SELECT 'plan' || n, 'plan' || n || '@example.com', (7000000000 + n)::text, 'Plan', 'Usuario', 0, now(), now(),
+                   'APP_USER', 'x', 1, 1, 1, false
+            FROM generate_series(1, :users) n
+        """), {"users": USERS})
+        conn.execute(text(ANALYZE))
+        yield conn
+        transaction.rollback()
+        with conn.begin():
+            conn.execute(text(ANALYZE))
+
+
+def test_hot_queries_use_indexes(seeded):
+    plans = explain_hot_queries(seeded)
+    assert set(plans) == set(HOT_QUERIES)
+    seq_scans = {name: plan for name, plan in plans.items() if "Seq Scan" in plan}
+    assert not seq_scans, "\n\n".join(f"{name}:\n{plan}" for name, plan in seq_scans.items())
@@ -0,0 +1,56 @@
+import time
+
+import pytest
+
+from app.core import database as db
+
+PRODUCTS = "/products/products"
+
+
+@pytest.fixture
+def replica(database, monkeypatch, client):
+    """Simula una réplica (el mismo primario) y registra cuándo se elige"""
+    chosen = []
+    monkeypatch.setattr(db.replicas, "engines", [database])
+    monkeypatch.setattr(db.replicas, "choose", lambda: chosen.append(True) or database)
+    client.cookies.clear()
+    yield chosen
+    client.cookies.clear()
+
+
+def test_write_returns_marker_and_reads_go_to_primary(client, admin_headers, company, product_data, replica):
+    response = client.post(f"{PRODUCTS}/create", json=product_data("R1"), headers=admin_headers)
+    until = float(response.headers[db.READ_YOUR_WRITES_HEADER])
+    assert time.time() < until <= time.time() + db.settings.DB_READ_YOUR_WRITES_SECONDS
+    assert response.cookies[db.READ_YOUR_WRITES_COOKIE] == response.headers[db.READ_YOUR_WRITES_HEADER]
+    product_id = response.json()["id"]
+
+    # Con la cookie (cualquier worker la entiende) la lectura va al primario
+    assert client.get(f"{PRODUCTS}/{product_id}", headers=admin_headers).status_code == 200
+    assert replica == []
+
+    # Sin cookie, el header reenviado tiene el mismo efecto; sin marcador se usa la réplica
+    client.cookies.clear()
+    marker = {db.READ_YOUR_WRITES_HEADER: response.headers[db.READ_YOUR_WRITES_HEADER]}
+    client.get(f"{PRODUCTS}/{product_id}", headers={**admin_headers, **marker})
+    assert replica == []
+    client.get(f"{PRODUCTS}/{product_id}", headers=admin_headers)
+    assert replica == [True]
+
+
+def test_expired_or_invalid_marker_reads_from_replica(client, admin_headers, company, product_data, replica):
+    product_id = client.post(f"{PRODUCTS}/create", json=product_data("R2"), headers=admin_headers).json()["id"]
+    client.cookies.clear()
+    for value in (f"{time.time() - 1:.3f}", "no-es-un-numero"):
+        client.get(f"{PRODUCTS}/{product_id}", headers={**admin_headers, db.READ_YOUR_WRITES_HEADER: value})
+    assert replica == [True, True]
+
+
+def test_forged_far_future_marker_reads_from_replica(client, admin_headers, company, product_data, replica):
+    product_id = client.post(f"{PRODUCTS}/create", json=product_data("R3"), headers=admin_headers).json()["id"]
+    client.cookies.clear()
+    for value in ("inf", "nan", "1e12", f"{time.time() + 3600:.3f}"):
+        client.get(f"{PRODUCTS}/{product_id}", headers={**admin_headers, db.READ_YOUR_WRITES_HEADER: value})
+    client.cookies.set(db.READ_YOUR_WRITES_COOKIE, "1e12")
+    client.get(f"{PRODUCTS}/{product_id}", headers=admin_headers)
+    assert replica == [True] * 5
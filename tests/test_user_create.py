@@ -0,0 +1,28 @@
+from sqlalchemy import text
+
+USERS = "/users/users"
+
+
+def _user(username: str, email: str, phone_number: str) -> dict:
+    return dict(username=username, email=email, phone_number=phone_number, first_name="Alta", last_name="Pruebas",
+                role="APP_USER", password_hash="secreto")
+
+
+def test_duplicate_fields_are_reported(client, admin_headers, database):
+    first = _user("alta-a", "alta-a@example.com", "3100000001")
+    cases = [
+        (_user("alta-a", "alta-b@example.com", "3100000002"), "Username already registered"),
+        (_user("alta-c", "alta-a@example.com", "3100000003"), "Email already registered"),
+        (_user("alta-d", "alta-d@example.com", "3100000001"), "Phone number already registered"),
+        (_user("alta-e", "alta-a@example.com", "3100000001"), "Email, Phone number already registered"),
+    ]
+    try:
+        assert client.post(f"{USERS}/create", json=first, headers=admin_headers).status_code == 201
+        for body, detail in cases:
+            response = client.post(f"{USERS}/create", json=body, headers=admin_headers)
+            assert response.status_code == 400, response.text
+            assert response.json()["detail"] == detail
+    finally:
+        with database.begin() as connection:
+            connection.execute(text("DELETE FROM glum.email_outbox WHERE recipient LIKE 'alta-%'"))
+            connection.execute(text("DELETE FROM glum.user WHERE username LIKE 'alta-%'"))
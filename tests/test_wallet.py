@@ -0,0 +1,8 @@
+USERS = "/users/users"
+
+
+def test_credit_rejects_reasons_reserved_for_redemptions(client, admin_headers):
+    response = client.post(f"{USERS}/1/wallet/credit", json={"amount": 10, "reason": "redemption"}, headers=admin_headers)
+    assert response.status_code == 422
+    response = client.post(f"{USERS}/1/wallet/credit", json={"amount": 10, "reason": "otra"}, headers=admin_headers)
+    assert response.status_code == 422